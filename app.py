@@ -1,29 +1,68 @@
 from flask import Flask
 from dotenv import load_dotenv
+import gc
 import os
 
-# 환경 변수 로드
-load_dotenv()
 
-app = Flask(__name__)
+def create_app(preload=False):
+    """애플리케이션 팩토리.
 
-# Blueprint 등록
-from routes.gongji import gongji_bp
-from routes.menu import lunch_bp, dinner_bp, anju_bp
-from routes.dice import soju_bp, dice_bp  # dice_bp도 따로 있다면 함께
-from routes.notice import noticesc_bp
-from routes.weather import weather_bp
+    정적 데이터(메뉴 등)는 여기서 미리 읽어 두고, 슬랙 클라이언트·작업자 스레드는 워커 프로세스에서
+    처음 필요할 때 만든다. `gunicorn --preload "app:create_app(preload=True)"` 로 띄우면 마스터가 읽은
+    데이터를 워커들이 copy-on-write로 공유하고, 스케줄러는 fork된 워커마다 바로 시작한다.
+    preload 없이(`gunicorn "app:app"`, `python app.py`) 만들면 이 프로세스에서 바로 시작한다.
+    """
+    # 환경 변수 로드
+    load_dotenv()
 
-app.register_blueprint(noticesc_bp)
-app.register_blueprint(gongji_bp)
-app.register_blueprint(lunch_bp)
-app.register_blueprint(dinner_bp)
-app.register_blueprint(anju_bp)
-app.register_blueprint(soju_bp)
-app.register_blueprint(dice_bp)
-app.register_blueprint(weather_bp)
+    app = Flask(__name__)
+
+    # Blueprint 등록
+    from routes.gongji import gongji_bp
+    from routes.menu import lunch_bp, dinner_bp, anju_bp
+    from routes.dice import soju_bp, dice_bp  # dice_bp도 따로 있다면 함께
+    from routes.notice import noticesc_bp
+    from routes.weather import weather_bp
+    from routes.events import events_bp
+    from services import metrics, signature
+    from services.scheduler import get_scheduler
+
+    app.register_blueprint(noticesc_bp)
+    app.register_blueprint(gongji_bp)
+    app.register_blueprint(lunch_bp)
+    app.register_blueprint(dinner_bp)
+    app.register_blueprint(anju_bp)
+    app.register_blueprint(soju_bp)
+    app.register_blueprint(dice_bp)
+    app.register_blueprint(weather_bp)
+    app.register_blueprint(events_bp)
+
+    # 경로별 지연시간, 외부 호출, 스케줄러 지연 지표 (/metrics)
+    metrics.init_app(app)
+    # 슬랙 요청 서명 확인용 원본 본문 보관
+    signature.init_app(app)
+
+    # 백그라운드 스케줄러: preload면 마스터에서는 스레드를 만들지 않고 fork 직후 워커에서 시작
+    if preload:
+        os.register_at_fork(after_in_child=get_scheduler)
+    else:
+        get_scheduler()
+
+    # 미리 읽은 객체를 GC 추적 대상에서 빼서 fork 후 페이지 복사를 줄인다
+    if hasattr(gc, "freeze"):
+        gc.freeze()
+
+    return app
+
+
+def __getattr__(name):
+    # `app:app` 으로 띄울 때만 만든다 (`app:create_app(...)` 로 띄우면 앱을 두 번 만들지 않도록)
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # 서버 실행
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
-    app.run(host="0.0.0.0", port=port)
+    create_app().run(host="0.0.0.0", port=port)
@@ -0,0 +1,154 @@
+# loadgen.py
+"""서명된 슬래시 명령 요청을 동시에 보내고 경로별 지연시간을 집계한다."""
+import hashlib
+import hmac
+import itertools
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import requests
+
+# 대기열이 가득 찼을 때 앱이 돌려주는 안내 (services.deferred.BUSY_TEXT).
+# 앱 모듈을 import하면 벤치마크 환경 변수를 넣기 전에 설정이 읽히므로 문자열로 둔다
+BUSY_TEXT = "⏳ 요청이 많아"
+
+# 경로별로 번갈아 보낼 명령 텍스트
+SCENARIOS = {
+    "/gongji": ["general 벤치마크 공지", "bench-00012,bench-00345 벤치마크 공지"],
+    "/noticesc": ["30 벤치마크 예약 공지", "list"],
+    "/lunch": ["", "한식", "한식|일식 -매운"],
+    "/dinner": ["", "고기"],
+    "/anju": ["", "서울대입구역 소주 -포차"],
+    "/soju": [""],
+    "/dice": ["", "1-100", "3d6+2", "4d6 kh3", "10000d6 stats"],
+    "/weather": ["", "서울", "내일", "서울 부산 학교 내일", "전국"],
+}
+
+
+def sign(secret, timestamp, body):
+    """Slack v0 요청 서명."""
+    base = f"v0:{timestamp}:{body}".encode()
+    return "v0=" + hmac.new(secret.encode(), base, hashlib.sha256).hexdigest()
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class LoadGenerator:
+    def __init__(self, base_url, signing_secret, response_base_url, concurrency=16):
+        self.base_url = base_url.rstrip("/")
+        self.signing_secret = signing_secret
+        self.response_base_url = response_base_url.rstrip("/")
+        self.concurrency = concurrency
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+        self.sent_at = {}   # response_url 토큰 → (경로, 보낸 시각)
+        self.deferred = {}  # 지연 실행으로 접수되어 response_url 응답을 기다리는 토큰 → 경로
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _slash_request(self, route, text):
+        req_id = f"{next(self._ids)}"
+        form = {
+            "token": "bench", "team_id": "TBENCH", "team_domain": "bench",
+            "channel_id": "CGENERAL", "channel_name": "general",
+            "user_id": "UBENCH", "user_name": "bench", "command": route, "text": text,
+            "response_url": f"{self.response_base_url}/response/{req_id}",
+            "trigger_id": f"bench.{req_id}.{time.time_ns()}",
+        }
+        return req_id, urlencode(form), "application/x-www-form-urlencoded"
+
+    def _event_request(self):
+        body = json.dumps({"type": "url_verification", "challenge": "bench"})
+        return None, body, "application/json"
+
+    def send(self, route, text):
+        if route == "/slack/events":
+            req_id, body, content_type = self._event_request()
+        else:
+            req_id, body, content_type = self._slash_request(route, text)
+        timestamp = str(int(time.time()))
+        headers = {
+            "Content-Type": content_type,
+            "X-Slack-Request-Timestamp": timestamp,
+            "X-Slack-Signature": sign(self.signing_secret, timestamp, body),
+        }
+        start = time.perf_counter()
+        if req_id:
+            self.sent_at[req_id] = (route, start)
+        try:
+            resp = self._session().post(self.base_url + route, data=body.encode(), headers=headers, timeout=30)
+            ok = resp.status_code < 400
+            if ok and req_id and not resp.content:
+                # 빈 200 응답 = 지연 실행 접수. 결과는 response_url로 와야 한다
+                self.deferred[req_id] = route
+            elif ok and BUSY_TEXT in resp.text:
+                # 대기열이 가득 차 거절된 요청은 실패로 센다
+                ok = False
+        except requests.RequestException:
+            ok = False
+        return route, time.perf_counter() - start, ok
+
+    def run(self, routes, requests_per_route):
+        """경로별 requests_per_route건을 섞어서 동시에 보내고 {경로: 결과} 를 반환."""
+        jobs = []
+        for route in routes:
+            texts = itertools.cycle(SCENARIOS.get(route, [""]))
+            jobs.extend((route, next(texts)) for _ in range(requests_per_route))
+        # 경로를 번갈아 보내 실제 혼합 부하와 비슷하게 만든다
+        random.Random(0).shuffle(jobs)
+
+        results = {route: {"latencies": [], "errors": 0} for route in routes}
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for route, elapsed, ok in pool.map(lambda job: self.send(*job), jobs):
+                results[route]["latencies"].append(elapsed)
+                if not ok:
+                    results[route]["errors"] += 1
+        wall = time.perf_counter() - started
+        for result in results.values():
+            result["wall"] = wall
+        return results
+
+    def completion_latencies(self, responses):
+        """response_url 수신 시각으로 지연 실행 명령의 완료 지연시간을 경로별로 계산.
+
+        {경로: (지연시간 목록, 접수됐지만 응답이 오지 않은 수)}를 반환.
+        """
+        per_route = {}
+        for req_id, route in self.deferred.items():
+            latencies, missing = per_route.setdefault(route, ([], [0]))
+            received = responses.get(req_id)
+            if received is None:
+                missing[0] += 1
+            else:
+                latencies.append(received - self.sent_at[req_id][1])
+        return {route: (latencies, missing[0]) for route, (latencies, missing) in per_route.items()}
+
+
+def summarize(latencies, errors=0, wall=None):
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "rps": len(values) / wall if wall else 0.0,
+        "p50_ms": percentile(values, 50) * 1000,
+        "p95_ms": percentile(values, 95) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+    }
+
+__all__ = ["LoadGenerator", "SCENARIOS", "sign", "summarize", "percentile"]
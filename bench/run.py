@@ -0,0 +1,133 @@
+# run.py
+"""오프라인 부하 테스트 실행기.
+
+로컬 Slack/기상청 스텁을 띄우고 app.py의 모든 POST 경로에 서명된 요청을 보낸 뒤
+경로별 p50/p95/p99 지연시간과 초당 처리량을 출력한다.
+
+    python -m bench.run --requests 200 --concurrency 16
+    python -m bench.run --stubs-only          # 외부에서 띄운 gunicorn 대상 측정용
+    python -m bench.run --target http://127.0.0.1:8000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from bench.loadgen import LoadGenerator, summarize
+from bench.stubs import KMA_PATH, StubState, start_stub_server
+
+SIGNING_SECRET = "bench-signing-secret"
+SLASH_ROUTES = ["/gongji", "/noticesc", "/lunch", "/dinner", "/anju", "/soju", "/dice", "/weather", "/slack/events"]
+
+
+def stub_environ(stub_url):
+    """앱이 스텁을 바라보도록 하는 환경 변수. SQLite 파일은 모두 임시 디렉터리에 만든다 (체크아웃의 DB를 건드리지 않도록)."""
+    data_dir = tempfile.mkdtemp(prefix="bench-")
+    return {
+        "SLACK_BOT_TOKEN": "xoxb-bench",
+        "SLACK_SIGNING_SECRET": SIGNING_SECRET,
+        "SLACK_API_URL": f"{stub_url}/api/",
+        "SLACK_RESPONSE_URL_BASE": f"{stub_url}/response/",
+        "KMA_SERVICE_KEY": "bench",
+        "KMA_API_URL": f"{stub_url}{KMA_PATH}",
+        "NOTICE_DB_PATH": os.path.join(data_dir, "notices.sqlite3"),
+        "SLACK_INSTALL_DB": os.path.join(data_dir, "installations.sqlite3"),
+        "MENU_HISTORY_DB": os.path.join(data_dir, "menu_history.sqlite3"),
+        "IDEMPOTENCY_DB": os.path.join(data_dir, "idempotency.sqlite3"),
+        "FORECAST_CACHE_DB": os.path.join(data_dir, "forecasts.sqlite3"),
+    }
+
+
+def start_app_server():
+    """app.py를 같은 프로세스의 멀티스레드 werkzeug 서버로 띄운다. (환경 변수 설정 후 호출)"""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    from app import app
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, name="bench-app", daemon=True).start()
+    routes = sorted({rule.rule for rule in app.url_map.iter_rules() if "POST" in rule.methods})
+    return server, f"http://127.0.0.1:{server.server_port}", routes
+
+
+def print_report(rows):
+    # (완료) 행: count=받은 응답 수, errors=접수됐지만 응답이 오지 않은 수
+    header = f"{'route':<24}{'count':>7}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for route, s in rows.items():
+        print(f"{route:<24}{s['count']:>7}{s['errors']:>8}{s['rps']:>9.1f}"
+              f"{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="slack-bots 오프라인 부하 테스트")
+    parser.add_argument("--requests", type=int, default=200, help="경로별 요청 수")
+    parser.add_argument("--concurrency", type=int, default=16, help="동시 요청 수")
+    parser.add_argument("--target", help="이미 실행 중인 앱 주소 (생략 시 같은 프로세스에서 실행)")
+    parser.add_argument("--stubs-only", action="store_true", help="스텁만 띄우고 환경 변수를 출력")
+    parser.add_argument("--stub-port", type=int, default=0)
+    parser.add_argument("--channels", type=int, default=3000, help="스텁 워크스페이스 채널 수")
+    parser.add_argument("--slack-latency", type=float, default=0.05, help="스텁 Slack 응답 지연(초)")
+    parser.add_argument("--kma-latency", type=float, default=0.2, help="스텁 기상청 응답 지연(초)")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="N번째 Slack 요청마다 429 응답")
+    parser.add_argument("--settle", type=float, default=5.0, help="지연 실행 응답을 기다리는 시간(초)")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    args = parser.parse_args(argv)
+
+    state = StubState(args.channels, args.slack_latency, args.kma_latency, args.rate_limit_every)
+    _, stub_url = start_stub_server(state, port=args.stub_port)
+    environ = stub_environ(stub_url)
+
+    if args.stubs_only:
+        for key, value in environ.items():
+            print(f"export {key}={value}")
+        print(f"# 스텁 서버 실행 중: {stub_url} (Ctrl+C 로 종료)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            return 0
+
+    if args.target:
+        target, routes = args.target, SLASH_ROUTES
+    else:
+        os.environ.update(environ)
+        _, target, routes = start_app_server()
+
+    generator = LoadGenerator(target, SIGNING_SECRET, stub_url, args.concurrency)
+    results = generator.run(routes, args.requests)
+
+    # 지연 실행 명령의 response_url 도착을 기다린다 (3초간 새 응답이 없으면 종료)
+    deadline = time.monotonic() + args.settle
+    seen, idle_since = -1, time.monotonic()
+    while time.monotonic() < deadline and time.monotonic() - idle_since < 3.0:
+        if len(state.responses) != seen:
+            seen, idle_since = len(state.responses), time.monotonic()
+        time.sleep(0.1)
+
+    rows = {route: summarize(r["latencies"], r["errors"], r["wall"]) for route, r in results.items()}
+    for route, (latencies, missing) in sorted(generator.completion_latencies(state.responses).items()):
+        # 응답이 오지 않은 요청은 오류로 센다 (백분위수는 받은 응답만으로 계산)
+        rows[f"{route} (완료)"] = summarize(latencies, errors=missing, wall=results[route]["wall"])
+        if missing:
+            print(f"⚠️ {route}: 지연 실행 {len(latencies) + missing}건 중 {missing}건의 응답을 받지 못했습니다. (--settle 을 늘려 보세요)")
+
+    print_report(rows)
+    print(f"\nupstream 호출: {json.dumps(state.calls, ensure_ascii=False)}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"routes": rows, "upstream_calls": state.calls}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
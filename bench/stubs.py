@@ -0,0 +1,131 @@
+# stubs.py
+"""벤치마크용 로컬 Slack Web API / 기상청 단기예보 스텁 서버."""
+import datetime
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+KMA_PATH = "/1360000/VilageFcstInfoService_2.0/getVilageFcst"
+KMA_CATEGORIES = {
+    "TMP": "18", "SKY": "3", "PTY": "0", "POP": "20", "PCP": "강수없음", "REH": "60",
+    "SNO": "적설없음", "UUU": "1.2", "VVV": "-0.8", "VEC": "250", "WSD": "2.1", "WAV": "0",
+}
+
+
+class StubState:
+    """스텁 서버 설정과 호출 기록."""
+
+    def __init__(self, channels=3000, slack_latency=0.05, kma_latency=0.2, rate_limit_every=0):
+        self.channels = [{"id": f"C{i:06d}", "name": f"bench-{i:05d}"} for i in range(channels)]
+        self.channels.append({"id": "CGENERAL", "name": "general"})
+        self.slack_latency = slack_latency
+        self.kma_latency = kma_latency
+        # N번째 Slack 요청마다 429 응답 (0이면 끔)
+        self.rate_limit_every = rate_limit_every
+        self._lock = threading.Lock()
+        self.calls = {}
+        self.responses = {}   # response_url 토큰 → 수신 시각
+
+    def count(self, name):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return self.calls[name]
+
+
+def _make_handler(state):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _params(self):
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            if body:
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    params.update(json.loads(body))
+                else:
+                    params.update({k: v[0] for k, v in parse_qs(body.decode()).items()})
+            return url.path, params
+
+        def _send_json(self, payload, status=200, headers=None):
+            body = json.dumps(payload, ensure_ascii=False).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._dispatch()
+
+        def do_POST(self):
+            self._dispatch()
+
+        def _dispatch(self):
+            path, params = self._params()
+            if path.startswith("/api/"):
+                self._slack(path[len("/api/"):], params)
+            elif path == KMA_PATH:
+                self._kma(params)
+            elif path.startswith("/response/"):
+                state.responses[path[len("/response/"):]] = time.perf_counter()
+                state.count("response_url")
+                self._send_json({"ok": True})
+            else:
+                self._send_json({"error": "not_found"}, status=404)
+
+        def _slack(self, method, params):
+            n = state.count(method)
+            time.sleep(state.slack_latency)
+            if state.rate_limit_every and n % state.rate_limit_every == 0:
+                self._send_json({"ok": False, "error": "ratelimited"}, status=429, headers={"Retry-After": "1"})
+                return
+            if method == "conversations.list":
+                limit = int(params.get("limit") or 100)
+                start = int(params.get("cursor") or 0)
+                page = state.channels[start:start + limit]
+                next_cursor = str(start + limit) if start + limit < len(state.channels) else ""
+                self._send_json({"ok": True, "channels": page, "response_metadata": {"next_cursor": next_cursor}})
+            elif method == "chat.postMessage":
+                self._send_json({"ok": True, "channel": params.get("channel"), "ts": f"{time.time():.6f}"})
+            else:
+                self._send_json({"ok": True})
+
+        def _kma(self, params):
+            state.count("getVilageFcst")
+            time.sleep(state.kma_latency)
+            base = datetime.datetime.strptime(params["base_date"] + params["base_time"], "%Y%m%d%H%M")
+            items = []
+            for h in range(1, 1000 // len(KMA_CATEGORIES) + 1):
+                slot = base + datetime.timedelta(hours=h)
+                for category, value in KMA_CATEGORIES.items():
+                    items.append({
+                        "baseDate": params["base_date"], "baseTime": params["base_time"],
+                        "category": category, "fcstDate": slot.strftime("%Y%m%d"),
+                        "fcstTime": slot.strftime("%H00"), "fcstValue": value,
+                        "nx": int(params["nx"]), "ny": int(params["ny"]),
+                    })
+            self._send_json({"response": {
+                "header": {"resultCode": "00", "resultMsg": "NORMAL_SERVICE"},
+                "body": {"dataType": "JSON", "items": {"item": items}, "totalCount": len(items)},
+            }})
+
+    return StubHandler
+
+
+def start_stub_server(state, host="127.0.0.1", port=0):
+    """스텁 서버를 백그라운드 스레드로 띄우고 (서버, 기본 URL)을 반환."""
+    server = ThreadingHTTPServer((host, port), _make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="bench-stub", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+__all__ = ["StubState", "start_stub_server", "KMA_PATH"]
@@ -1,18 +1,53 @@
 from flask import Blueprint, request, jsonify
+from collections import Counter
+from functools import lru_cache
+import json
+import math
+import os
 import random
 import re
 
+from services.sampling import AliasTable
+
+try:
+    import numpy
+except ImportError:  # 선택 의존성: 없으면 표준 라이브러리로 굴린다
+    numpy = None
+
 
 dice_bp = Blueprint("dice", __name__)
-soju_bp = Blueprint("soju", __name__)  
+soju_bp = Blueprint("soju", __name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "..", "data")
+
+# 한 식에서 굴릴 수 있는 주사위 총 개수와 최대 면 수
+MAX_DICE = 1000000
+MAX_SIDES = 10000
+MAX_TERMS = 10
+# 한 식에서 뽑는 난수 수 상한. 항마다의 비용은 roll_cost 참고
+MAX_ROLL_COST = 50000
+# 면 수보다 많이 굴려 눈별 횟수(다항분포)를 뽑을 때의 최대 면 수. 넘으면 주사위를 하나씩 굴린다
+MAX_MULTINOMIAL_SIDES = 1000
+# 이 개수 이하면 개별 눈을 보여 주고, 넘으면 합계와 분포 요약만 보여 준다
+SHOW_ROLLS_LIMIT = 20
+# 이 면 수 이하면 눈별 횟수를 보여 준다
+HISTOGRAM_SIDES = 20
+
+USAGE_TEXT = "❗ 형식: `/dice 1-100`, `/dice 3d6+2`, `/dice 4d6 kh3`, `/dice 10000d6 stats`"
+
+def load_weighted_table(filename):
+    """[{"name", "weight"}, ...] 파일을 읽어 별칭 표를 만든다."""
+    with open(os.path.join(DATA_DIR, filename), encoding="utf-8") as f:
+        rows = json.load(f)
+    return AliasTable([row["name"] for row in rows], [row["weight"] for row in rows])
+
+drink_table = load_weighted_table("drinks.json")
 
 @soju_bp.route("/soju", methods=["POST"])
 def recommend_drink():
     try:
-        alcohol_options = ["소주", "맥주", "소맥", "막걸리", "와인", "칵테일"]
-        weights = [40, 25, 15, 10, 7, 3]
-
-        selected = random.choices(alcohol_options, weights=weights, k=1)[0]
+        selected = drink_table.sample()
         return jsonify({
             "response_type": "in_channel",
             "text": f"🍶 오늘의 주종 추천: *{selected}*"
@@ -21,6 +56,191 @@ def recommend_drink():
         return jsonify({"text": f"⚠️ 오류 발생: {str(e)}"})
 
 
+class DiceError(ValueError):
+    """주사위 식 해석 오류 (사용자에게 그대로 보여 준다)."""
+
+TERM_RE = re.compile(r"\s*([+-]?)\s*(?:(\d*)d(\d+)(?:\s*(kh|kl)\s*(\d+))?|(\d+))\s*")
+STATS_WORDS = ("stats", "통계")
+
+@lru_cache(maxsize=1024)
+def parse_expression(text):
+    """`3d6+2`, `100d20 kh3`, `10000d6 stats` 같은 식을 (주사위 항 목록, 상수, 통계 여부)로 해석.
+
+    주사위 항은 (부호, 개수, 면 수, 유지 방식, 유지 개수). 같은 식은 다시 해석하지 않는다.
+    """
+    words = text.lower().split()
+    stats = any(word in STATS_WORDS for word in words)
+    expr = " ".join(word for word in words if word not in STATS_WORDS)
+
+    terms, constant, pos, total, cost = [], 0, 0, 0, 0
+    while pos < len(expr):
+        match = TERM_RE.match(expr, pos)
+        if not match or match.end() == pos or (pos and not match.group(1)):
+            raise DiceError(USAGE_TEXT)
+        pos = match.end()
+        sign = -1 if match.group(1) == "-" else 1
+        if match.group(6):
+            constant += sign * int(match.group(6))
+            continue
+
+        count = int(match.group(2) or 1)
+        sides = int(match.group(3))
+        keep = match.group(4)
+        keep_n = int(match.group(5)) if keep else count
+        if not 1 <= count or not 1 <= sides <= MAX_SIDES:
+            raise DiceError(f"❗ 주사위는 1개 이상, 면 수는 1~{MAX_SIDES} 사이여야 합니다.")
+        if keep and not 1 <= keep_n <= count:
+            raise DiceError(f"❗ 유지 개수는 1~{count} 사이여야 합니다.")
+        total += count
+        if total > MAX_DICE:
+            raise DiceError(f"❗ 한 번에 최대 {MAX_DICE:,}개까지 굴릴 수 있습니다.")
+        cost += roll_cost(count, sides, keep, keep_n)
+        if cost > MAX_ROLL_COST:
+            raise DiceError("❗ 식이 너무 큽니다. 주사위 개수나 면 수를 줄여 주세요.")
+        terms.append((sign, count, sides, keep, keep_n))
+
+    if not terms or len(terms) > MAX_TERMS:
+        raise DiceError(USAGE_TEXT)
+    return tuple(terms), constant, stats
+
+def _binomial(n, p):
+    """이항분포 표본. n·p가 크면 정규 근사를 쓴다 (Python 3.12 이상은 표준 구현 사용)."""
+    if hasattr(random, "binomialvariate"):
+        return random.binomialvariate(n, p)
+    if p > 0.5:
+        return n - _binomial(n, 1.0 - p)
+    if p <= 0.0:
+        return 0
+    if n * p < 30:
+        # 성공 사이의 간격(기하분포)을 건너뛰며 센다. 기대 비용 O(n·p)
+        log_q = math.log1p(-p)
+        successes, trials = 0, 0
+        while True:
+            trials += int(math.log(1.0 - random.random()) / log_q) + 1
+            if trials > n:
+                return successes
+            successes += 1
+    value = round(random.gauss(n * p, math.sqrt(n * p * (1.0 - p))))
+    return min(n, max(0, value))
+
+def roll_faces(count, sides):
+    """count개의 sides면체 주사위를 굴려 {눈: 나온 횟수}를 반환.
+
+    면 수보다 많이 굴리면 주사위를 하나씩 뽑지 않고 눈별 횟수(다항분포)를 한 번에 뽑는다.
+    면 수가 MAX_MULTINOMIAL_SIDES를 넘으면 다항분포가 더 비싸므로 하나씩 굴린다.
+    """
+    if count <= sides or sides > MAX_MULTINOMIAL_SIDES:
+        return Counter(random.choices(range(1, sides + 1), k=count))
+    if numpy is not None:
+        counts = numpy.random.default_rng().multinomial(count, [1.0 / sides] * sides)
+        return {face: int(n) for face, n in enumerate(counts, 1) if n}
+
+    faces, remaining = {}, count
+    for face in range(1, sides):
+        if not remaining:
+            break
+        n = _binomial(remaining, 1.0 / (sides - face + 1))
+        if n:
+            faces[face] = n
+            remaining -= n
+    if remaining:
+        faces[sides] = remaining
+    return faces
+
+def keep_order_statistics(count, sides, keep, keep_n):
+    """유지 개수가 적어 유지할 눈(순서통계량)만 뽑는 편이 싼 경우 True."""
+    return bool(keep) and keep_n < min(count, sides)
+
+def roll_cost(count, sides, keep, keep_n):
+    """한 항을 굴릴 때 뽑는 난수 수. 유지할 눈만 뽑으면 유지 개수, 다항분포면 면 수, 하나씩 굴리면 개수."""
+    if keep_order_statistics(count, sides, keep, keep_n):
+        return keep_n
+    if count <= sides or sides > MAX_MULTINOMIAL_SIDES:
+        return count
+    return sides
+
+def roll_kept_faces(count, sides, keep, keep_n):
+    """count개 중 높은(kh) 또는 낮은(kl) keep_n개의 눈만 뽑아 {눈: 횟수}를 반환. 비용 O(keep_n).
+
+    균등분포 최댓값부터 차례로 U(k) = U(k+1)·V^(1/k) 로 뽑고 눈 = ⌊면 수·U⌋+1 로 바꾼다.
+    """
+    faces, u = Counter(), 1.0
+    for remaining in range(count, count - keep_n, -1):
+        u *= random.random() ** (1.0 / remaining)
+        value = u if keep == "kh" else 1.0 - u
+        faces[min(int(value * sides) + 1, sides)] += 1
+    return faces
+
+def keep_faces(faces, keep, keep_n):
+    """높은(kh) 또는 낮은(kl) 눈부터 keep_n개만 남긴 {눈: 횟수}."""
+    if not keep:
+        return faces
+    kept, left = {}, keep_n
+    for face in sorted(faces, reverse=(keep == "kh")):
+        if not left:
+            break
+        take = min(faces[face], left)
+        kept[face] = take
+        left -= take
+    return kept
+
+def summarize_faces(faces):
+    """{눈: 횟수}의 개수·평균·표준편차·중앙값·최소·최대."""
+    n = sum(faces.values())
+    mean = sum(face * c for face, c in faces.items()) / n
+    var = sum(c * (face - mean) ** 2 for face, c in faces.items()) / n
+    median, seen = None, 0
+    for face in sorted(faces):
+        seen += faces[face]
+        if seen * 2 >= n:
+            median = face
+            break
+    return {"count": n, "mean": mean, "stdev": math.sqrt(var), "median": median,
+            "min": min(faces), "max": max(faces)}
+
+def term_label(count, sides, keep, keep_n):
+    return f"{count}d{sides}" + (f" {keep}{keep_n}" if keep else "")
+
+def format_rolls(rolls, keep, keep_n):
+    """개별 눈 목록. 유지하지 않은 눈은 취소선으로 표시."""
+    dropped = set()
+    if keep:
+        order = sorted(range(len(rolls)), key=rolls.__getitem__, reverse=(keep == "kh"))
+        dropped = set(order[keep_n:])
+    return "[" + ", ".join(f"~{r}~" if i in dropped else str(r) for i, r in enumerate(rolls)) + "]"
+
+def roll_expression(text):
+    """식을 굴려 응답 문자열을 만든다."""
+    terms, constant, stats = parse_expression(text)
+    total_dice = sum(term[1] for term in terms)
+    show_rolls = total_dice <= SHOW_ROLLS_LIMIT and not stats
+
+    total, lines = constant, []
+    for sign, count, sides, keep, keep_n in terms:
+        label = term_label(count, sides, keep, keep_n)
+        if show_rolls:
+            rolls = random.choices(range(1, sides + 1), k=count)
+            kept = keep_faces(Counter(rolls), keep, keep_n)
+            lines.append(f"> {label}: {format_rolls(rolls, keep, keep_n)}")
+        else:
+            if keep_order_statistics(count, sides, keep, keep_n):
+                kept = roll_kept_faces(count, sides, keep, keep_n)
+            else:
+                kept = keep_faces(roll_faces(count, sides), keep, keep_n)
+            s = summarize_faces(kept)
+            lines.append(
+                f"> {label}: 평균 {s['mean']:.2f} · 표준편차 {s['stdev']:.2f} · "
+                f"중앙값 {s['median']} · 최소 {s['min']} · 최대 {s['max']}"
+            )
+            if sides <= HISTOGRAM_SIDES:
+                shown = sorted(kept) if keep else range(1, sides + 1)
+                lines.append("> 분포 " + " · ".join(f"{face}:{kept.get(face, 0)}" for face in shown))
+        total += sign * sum(face * c for face, c in kept.items())
+
+    expr = " ".join(word for word in text.split() if word.lower() not in STATS_WORDS)
+    return f"🎲 `{expr}` ➜ *{total:,}*\n" + "\n".join(lines)
+
+
 @dice_bp.route("/dice", methods=["POST"])
 def roll_dice():
     text = request.form.get("text", "").strip()
@@ -31,13 +251,13 @@ def roll_dice():
 
         # 사용자가 범위를 입력한 경우 처리
         if text:
-            match = re.match(r"(\d+)\s*-\s*(\d+)", text)
-            if match:
-                low, high = int(match.group(1)), int(match.group(2))
-                if low >= high or high - low > 1000000:
-                    return jsonify({"text": "❗ 유효한 범위 (예: 1-100)를 입력하세요."})
-            else:
-                return jsonify({"text": "❗ 범위는 '1-100'처럼 입력해야 합니다."})
+            match = re.fullmatch(r"(\d+)\s*-\s*(\d+)", text)
+            if not match:
+                # 주사위 식 (3d6+2, 4d6 kh3, 10000d6 stats ...)
+                return jsonify({"response_type": "in_channel", "text": roll_expression(text)})
+            low, high = int(match.group(1)), int(match.group(2))
+            if low >= high or high - low > 1000000:
+                return jsonify({"text": "❗ 유효한 범위 (예: 1-100)를 입력하세요."})
 
         result = random.randint(low, high)
         return jsonify({
@@ -45,7 +265,9 @@ def roll_dice():
             "text": f"🎲 주사위 굴림 결과: *{low} ~ {high} ➜ {result}*"
         })
 
+    except DiceError as e:
+        return jsonify({"text": str(e)})
     except Exception as e:
         return jsonify({"text": f"⚠️ 오류 발생: {str(e)}"})
 
-__all__ = ["dice_bp", "soju_bp"]
\ No newline at end of file
+__all__ = ["dice_bp", "soju_bp"]
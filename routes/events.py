@@ -0,0 +1,53 @@
+from flask import Blueprint, request, jsonify
+
+from services.signature import signing_secret, verify_slack_request
+from services.workspaces import get_workspace_pool
+
+events_bp = Blueprint("events", __name__)
+
+
+@events_bp.route("/slack/events", methods=["POST"])
+def slack_events():
+    # 채널 캐시·설치 정보를 바꾸는 요청이므로 서명 비밀키가 없으면 받지 않는다
+    if not signing_secret():
+        return "SLACK_SIGNING_SECRET is not configured", 403
+    if not verify_slack_request():
+        return "invalid signature", 403
+
+    payload = request.get_json(silent=True) or {}
+
+    # Events API URL 등록 확인
+    if payload.get("type") == "url_verification":
+        return jsonify({"challenge": payload.get("challenge")})
+
+    event = payload.get("event") or {}
+    event_type = event.get("type")
+    team_id = payload.get("team_id")
+    pool = get_workspace_pool()
+
+    # 앱 삭제 또는 봇 토큰 폐기 시 설치 정보 정리
+    bot_revoked = event_type == "tokens_revoked" and (event.get("tokens") or {}).get("bot")
+    if team_id and (event_type == "app_uninstalled" or bot_revoked):
+        pool.store.remove(team_id)
+        pool.invalidate(team_id)
+        return "", 200
+
+    # 메모리에 없는 워크스페이스는 다음 사용 시 채널 목록을 새로 받으므로 갱신할 것이 없다
+    workspace = pool.peek(team_id)
+    if workspace is None:
+        return "", 200
+    channel_directory = workspace.channels
+
+    # 채널 생성/이름 변경 시 채널 캐시 갱신
+    if event_type in ("channel_created", "channel_rename"):
+        ch = event.get("channel") or {}
+        if ch.get("id") and ch.get("name"):
+            channel_directory.upsert(ch["id"], ch["name"])
+    elif event_type in ("channel_deleted", "channel_archive"):
+        channel_directory.remove(event.get("channel"))
+    elif event_type == "channel_unarchive":
+        channel_directory.invalidate()
+
+    return "", 200
+
+__all__ = ["events_bp"]
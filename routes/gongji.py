@@ -1,56 +1,247 @@
 from flask import Blueprint, request, jsonify
-from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
-import os
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import asyncio
+import threading
+import time
+
+from services.deferred import deferred, is_deferred, send_response, REPLY_LATER
+from services.idempotency import idempotent
+from services.workspaces import get_workspace
+from services.delivery_log import get_delivery_log
 
 gongji_bp = Blueprint("gongji", __name__)
 
-# 슬랙 클라이언트 초기화
-SLACK_BOT_TOKEN = os.environ.get("SLACK_BOT_TOKEN")
-client = WebClient(token=SLACK_BOT_TOKEN)
+# 전송 결과를 기다리는 최대 시간(초). 넘기면 그때까지의 결과를 알리고 대기열에서 계속 전송한다.
+DELIVERY_WAIT_TIMEOUT = 20
+# 한 번에 공지할 수 있는 최대 채널 수
+MAX_TARGET_CHANNELS = 50
 
-@gongji_bp.route("/gongji", methods=["POST"])
-def gongjiFunc():
-    text = request.form.get("text", "")
-    user_id = request.form.get("user_id", "")
-    user_name = request.form.get("user_name", "")
+USAGE_TEXT = "❗ 형식 오류: `/공지 [채널명|#a,#b|접두어*] [메시지내용]` 또는 `/공지 status [전송 번호]` 형식으로 입력하세요."
+NOT_IN_CHANNEL_TEXT = "❗ 봇이 해당 채널에 없습니다. `/invite @공지봇` 후 다시 시도하세요."
 
-    try:
-        parts = text.strip().split()
-        if len(parts) < 2:
-            return jsonify({"text": "❗ 형식 오류: `/공지 [채널명] [메시지내용]` 형식으로 입력하세요."})
+STATUS_TEXT = {
+    "queued": "⏳ 전송 대기 중", "sending": "📤 전송 중", "retrying": "🔁 재시도 대기 중",
+    "sent": "✅ 전송 완료", "failed": "❗ 전송 실패",
+}
+
+def status_reply(workspace, text, user_id):
+    """`status [전송 번호]` 명령이면 전송 상태 응답을, 아니면 None을 반환. 자기가 보낸 전송만 조회된다."""
+    parts = text.strip().split()
+    if len(parts) != 2 or parts[0] != "status" or not parts[1].isdigit():
+        return None
+    status = get_delivery_log().get(int(parts[1]), workspace.key, user_id)
+    if status is None:
+        return {"text": f"❓ {parts[1]}번 전송 기록이 없습니다. (직접 보낸 최근 공지만 조회할 수 있습니다)"}
+    text = f"{STATUS_TEXT.get(status['status'], status['status'])}: 전송 번호 {status['id']}, 채널 <#{status['channel']}>, 시도 {status['attempts']}회"
+    if status["error"]:
+        text += f" (오류: {status['error']})"
+    return {"text": text}
+
+def parse_targets(token):
+    """`#a,#b`, `prefix*` 형태의 채널 지정을 대상 목록으로 분리."""
+    return [t.lstrip("#") for t in token.split(",") if t.lstrip("#")]
+
+def plan_announcement(workspace, text, user_id, refresh=True):
+    """명령 텍스트를 해석해 (오류 응답, 대상 채널, 못 찾은 대상, 보낼 메시지)를 반환."""
+    parts = text.strip().split()
+    targets = parse_targets(parts[0]) if parts else []
+    if len(parts) < 2 or not targets:
+        return {"text": USAGE_TEXT}, [], [], None
+    message = " ".join(parts[1:])
 
-        channel_name = parts[0].lstrip("#")
-        message = " ".join(parts[1:])
+    # 채널 ID 탐색 (공용 채널 캐시에서 한 번에 조회)
+    channels, missing, seen = [], [], set()
+    for target, found in zip(targets, workspace.channels.resolve(targets, refresh=refresh)):
+        if not found:
+            missing.append(target)
+        for name, channel_id in found:
+            if channel_id not in seen:
+                seen.add(channel_id)
+                channels.append((name, channel_id))
 
-        # 채널 ID 탐색
-        response = client.conversations_list()
-        channel_id = None
-        matched_channel = None
-        for ch in response["channels"]:
-            if channel_name in ch["name"]:
-                channel_id = ch["id"]
-                matched_channel = ch["name"]
-                break
+    if not channels:
+        return {"text": f"❗ 채널을 찾을 수 없습니다: `{', '.join(missing)}`"}, [], missing, None
+    if len(channels) > MAX_TARGET_CHANNELS:
+        return {"text": f"❗ 대상 채널이 너무 많습니다 ({len(channels)}개). 최대 {MAX_TARGET_CHANNELS}개까지 보낼 수 있습니다."}, [], missing, None
 
-        if not channel_id:
-            return jsonify({"text": f"❗ 채널을 찾을 수 없습니다: `{channel_name}`"})
+    # 메시지 구성
+    return None, channels, missing, f"<@{user_id}>: {message}"
 
-        # 메시지 구성
-        formatted_message = f"<@{user_id}>: {message}"
+def submit_all(workspace, channels, formatted_message, user_id):
+    """모든 대상 채널을 워크스페이스의 전송 대기열에 넣는다. 동시 전송 수는 전송 대기열 작업자 수로 제한된다."""
+    return [
+        (name, workspace.post_message(channel_id, formatted_message, requested_by=user_id))
+        for name, channel_id in channels
+    ]
 
-        # 전송
-        client.chat_postMessage(channel=channel_id, text=formatted_message)
+def _is_timeout(error):
+    return isinstance(error, (FutureTimeoutError, asyncio.TimeoutError))
 
-        return jsonify({"text": f"✅ `#{matched_channel}` 채널에 공지를 보냈습니다."})
+def result_reply(outcomes, missing):
+    """채널별 (채널명, 전송, 오류) 결과로 응답을 만든다."""
+    if len(outcomes) == 1 and not missing:
+        name, delivery, error = outcomes[0]
+        if error is None:
+            return {"text": f"✅ `#{name}` 채널에 공지를 보냈습니다."}
+        if _is_timeout(error):
+            if delivery.id is None:
+                return {"text": f"⏳ `#{name}` 채널 공지가 전송 대기 중입니다."}
+            return {"text": f"⏳ `#{name}` 채널 공지가 전송 대기 중입니다. (전송 번호: {delivery.id}, `/공지 status {delivery.id}`로 확인)"}
+        raise error
 
-    except SlackApiError as e:
+    # 여러 채널: 결과 요약
+    sent, failed = [], []
+    for name, delivery, error in outcomes:
+        if error is None:
+            sent.append(f"`#{name}`")
+        elif _is_timeout(error):
+            failed.append(f"⏳ `#{name}`: 전송 대기 중" + (f" (전송 번호: {delivery.id})" if delivery.id is not None else ""))
+        elif isinstance(error, SlackApiError):
+            reason = error.response["error"]
+            if reason == "not_in_channel":
+                failed.append(f"❗ `#{name}`: 봇이 채널에 없습니다. `/invite @공지봇` 필요")
+            else:
+                failed.append(f"❗ `#{name}`: Slack API 오류({reason})")
+        else:
+            failed.append(f"❗ `#{name}`: {str(error)}")
+
+    lines = [f"📣 공지 전송 결과: 성공 {len(sent)} / 실패 {len(failed) + len(missing)}"]
+    if sent:
+        lines.append("✅ " + ", ".join(sent))
+    lines.extend(failed)
+    if missing:
+        lines.append(f"❓ 채널을 찾을 수 없음: `{', '.join(missing)}`")
+    return {"text": "\n".join(lines)}
+
+def error_reply(e):
+    if isinstance(e, SlackApiError):
         reason = e.response["error"]
         if reason == "not_in_channel":
-            return jsonify({"text": "❗ 봇이 해당 채널에 없습니다. `/invite @공지봇` 후 다시 시도하세요."})
-        return jsonify({"text": f"Slack API 오류({reason})로 인해 공지 실패."})
+            return {"text": NOT_IN_CHANNEL_TEXT}
+        return {"text": f"Slack API 오류({reason})로 인해 공지 실패."}
+    return {"text": f"서버 오류: {str(e)}"}
+
+def report_when_done(deliveries, missing, response_url):
+    """모든 전송이 끝나거나 DELIVERY_WAIT_TIMEOUT이 지나면 결과를 response_url로 보낸다.
+
+    전송 완료 콜백으로 처리하므로 지연 실행 작업자가 채널별 전송 한도(초당 1건)를 기다리며 묶이지 않는다.
+    """
+    lock = threading.Lock()
+    state = {"left": len(deliveries), "reported": False}
+
+    def report():
+        with lock:
+            if state["reported"]:
+                return
+            state["reported"] = True
+        timer.cancel()
+        outcomes = [
+            (name, d, d.future.exception() if d.future.done() else FutureTimeoutError())
+            for name, d in deliveries
+        ]
+        try:
+            payload = result_reply(outcomes, missing)
+        except Exception as e:
+            payload = error_reply(e)
+        send_response(response_url, payload, "/gongji")
+
+    def on_done(_):
+        with lock:
+            state["left"] -= 1
+            last = state["left"] == 0
+        if last:
+            report()
+
+    timer = threading.Timer(DELIVERY_WAIT_TIMEOUT, report)
+    timer.daemon = True
+    timer.start()
+    for _, delivery in deliveries:
+        delivery.future.add_done_callback(on_done)
+
+async def gongji_async(form):
+    """비동기 실행 모드: 채널 캐시 갱신과 전송 대기를 이벤트 루프에서 스레드 없이 기다린다.
+
+    chat.postMessage는 비동기 모드에서도 전송 대기열(작업자 스레드)로 보낸다. 요청 한도·재시도·채널별
+    순서를 한 곳에서 지키기 위해서이며, 작업자는 공용 keep-alive 연결 풀(PooledWebClient)을 쓴다.
+    SQLite를 읽고 쓰는 설치 정보·전송 기록 처리는 이벤트 루프를 막지 않도록 기본 실행기에서 돌린다.
+    """
+    from services.aio import get_runtime
+
+    loop = asyncio.get_running_loop()
+    try:
+        workspace = await loop.run_in_executor(None, get_workspace, form.get("team_id"))
+        status = await loop.run_in_executor(
+            None, status_reply, workspace, form.get("text", ""), form.get("user_id", "")
+        )
+        if status:
+            return status
+        if not workspace.channels.is_fresh:
+            await workspace.channels.arefresh(workspace.async_client(get_runtime().session))
+        reply, channels, missing, formatted_message = plan_announcement(
+            workspace, form.get("text", ""), form.get("user_id", ""), refresh=False
+        )
+        if any(not target.endswith("*") for target in missing) and workspace.channels.miss_refresh_due:
+            # find()와 같이 못 찾은 채널이 있으면 주기 제한 안에서 한 번 다시 받아 본다 (새로 만든 채널 등)
+            await workspace.channels.arefresh(workspace.async_client(get_runtime().session))
+            reply, channels, missing, formatted_message = plan_announcement(
+                workspace, form.get("text", ""), form.get("user_id", ""), refresh=False
+            )
+        if reply:
+            return reply
+
+        deliveries = await loop.run_in_executor(
+            None, submit_all, workspace, channels, formatted_message, form.get("user_id", "")
+        )
+
+        async def wait(delivery):
+            try:
+                await asyncio.wait_for(asyncio.wrap_future(delivery.future), DELIVERY_WAIT_TIMEOUT)
+                return None
+            except Exception as e:
+                return e
+
+        errors = await asyncio.gather(*(wait(delivery) for _, delivery in deliveries))
+        return result_reply([(name, d, e) for (name, d), e in zip(deliveries, errors)], missing)
+
+    except Exception as e:
+        return error_reply(e)
+
+@gongji_bp.route("/gongji", methods=["POST"])
+@idempotent
+@deferred(async_view=gongji_async)
+def gongjiFunc():
+    text = request.form.get("text", "")
+    user_id = request.form.get("user_id", "")
+    user_name = request.form.get("user_name", "")
+
+    try:
+        workspace = get_workspace(request.form.get("team_id"))
+        status = status_reply(workspace, text, user_id)
+        if status:
+            return jsonify(status)
+        reply, channels, missing, formatted_message = plan_announcement(workspace, text, user_id)
+        if reply:
+            return jsonify(reply)
+
+        # 전송 (전송 대기열 경유). 지연 실행 중이면 결과는 전송 완료 콜백에서 response_url로 보낸다
+        deliveries = submit_all(workspace, channels, formatted_message, user_id)
+        if is_deferred():
+            report_when_done(deliveries, missing, request.form["response_url"])
+            return REPLY_LATER
+
+        deadline = time.monotonic() + DELIVERY_WAIT_TIMEOUT
+        outcomes = []
+        for name, delivery in deliveries:
+            try:
+                delivery.wait(max(0, deadline - time.monotonic()))
+                outcomes.append((name, delivery, None))
+            except Exception as e:
+                outcomes.append((name, delivery, e))
+
+        return jsonify(result_reply(outcomes, missing))
 
     except Exception as e:
-        return jsonify({"text": f"서버 오류: {str(e)}"})
+        return jsonify(error_reply(e))
 
 __all__ = ["gongji_bp"]
@@ -1,9 +1,15 @@
 from flask import Blueprint, request, jsonify
 import json
+import logging
 import random
 import os
+import threading
+import time
 
+from services.lazy import per_process
+from services.pick_history import PickHistory
 
+logger = logging.getLogger(__name__)
 
 lunch_bp = Blueprint("lunch", __name__)
 dinner_bp = Blueprint("dinner", __name__)
@@ -12,28 +18,162 @@ anju_bp = Blueprint("anju", __name__)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "..", "data")
 
+# 메뉴 파일 변경 확인 주기(초)
+RELOAD_CHECK_INTERVAL = 2.0
+# 최근 추천한 메뉴를 다시 고를 확률 (0이면 후보가 남아 있는 한 제외)
+MENU_RECENT_WEIGHT = float(os.environ.get("MENU_RECENT_WEIGHT", "0"))
+# 최근 추천 제외를 위한 최대 재추첨 횟수
+MAX_PICK_ATTEMPTS = 16
+# 태그 조건별 후보 목록을 기억할 최대 개수 (넘으면 비운다)
+QUERY_CACHE_SIZE = 256
+
 def load_menu(filename):
     path = os.path.join(DATA_DIR, filename)
     with open(path, encoding="utf-8") as f:
         return json.load(f)
 
-lunch_items = load_menu("lunch_items.json")
-dinner_items = load_menu("dinner_items.json")
-anju_items = load_menu("anju_items.json")
+
+class MenuSnapshot:
+    """한 번 읽은 메뉴 목록, 태그 → 항목 번호 역색인, 태그 조건별 후보 캐시.
+
+    만든 뒤에는 목록과 색인을 바꾸지 않는다. 다시 읽으면 새 스냅숏을 만들어 한 번의 대입으로 교체하므로
+    요청은 스냅숏 하나만 잡고 쓰면 목록과 색인이 서로 어긋나지 않는다.
+    """
+
+    __slots__ = ("items", "all_ids", "tag_index", "candidates")
+
+    def __init__(self, items):
+        tag_index = {}
+        for n, item in enumerate(items):
+            for tag in item["tags"]:
+                tag_index.setdefault(tag.lower(), set()).add(n)
+        self.items = tuple(items)
+        self.all_ids = frozenset(range(len(items)))
+        self.tag_index = {tag: frozenset(ids) for tag, ids in tag_index.items()}
+        self.candidates = {}  # 정규화한 태그 조건 → 후보 항목 tuple
+
+    def query(self, text):
+        """태그 조건에 맞는 항목 번호 집합. 공백=AND, `a|b`=OR, `-a`=NOT."""
+        tag_index = self.tag_index
+        include, exclude = None, set()
+        for term in text.lower().split():
+            if term.startswith("-") and len(term) > 1:
+                exclude |= tag_index.get(term[1:], frozenset())
+                continue
+            matched = set()
+            for tag in term.split("|"):
+                matched |= tag_index.get(tag, frozenset())
+            include = matched if include is None else include & matched
+            if not include:
+                return frozenset()
+        if include is None:
+            include = self.all_ids
+        return include - exclude
+
+    def find(self, text):
+        """태그 조건에 맞는 항목 tuple. 정규화한 조건별로 캐시한다."""
+        key = " ".join(sorted(text.lower().split()))
+        found = self.candidates.get(key)
+        if found is None:
+            items = self.items
+            found = tuple(items[n] for n in sorted(self.query(key)))
+            if len(self.candidates) >= QUERY_CACHE_SIZE:
+                self.candidates.clear()
+            self.candidates[key] = found
+        return found
+
+
+class MenuCatalog:
+    """메뉴 스냅숏을 들고 있다가 파일이 바뀌면 다음 요청에서 다시 읽어 통째로 교체한다."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.path = os.path.join(DATA_DIR, filename)
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._mtime = None
+        self._reload()
+
+    def _reload(self):
+        mtime = os.path.getmtime(self.path)
+        self.snapshot = MenuSnapshot(load_menu(self.filename))
+        self._mtime = mtime
+
+    def refresh_if_changed(self):
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return
+        with self._lock:
+            if now - self._checked_at < RELOAD_CHECK_INTERVAL:
+                return
+            self._checked_at = now
+            try:
+                if os.path.getmtime(self.path) != self._mtime:
+                    self._reload()
+            except (OSError, ValueError) as e:
+                # 편집 중인 파일 등은 기존 목록을 유지
+                logger.warning("메뉴 다시 읽기 실패: %s %s", self.filename, e)
+
+    def current(self):
+        """파일 변경을 확인한 뒤의 스냅숏. 한 요청 안에서는 이것 하나만 쓴다."""
+        self.refresh_if_changed()
+        return self.snapshot
+
+    def query(self, text):
+        """태그 조건에 맞는 항목 번호 집합. 공백=AND, `a|b`=OR, `-a`=NOT."""
+        return self.current().query(text)
+
+    def candidates(self, text):
+        """태그 조건에 맞는 항목 tuple. 조건을 정규화해 캐시하고, 파일을 다시 읽으면 새 캐시를 쓴다."""
+        return self.current().find(text)
+
+    def pick(self, text="", recent=frozenset()):
+        """조건에 맞는 항목 하나를 무작위로 고른다. 없으면 None.
+
+        recent에 있는 이름은 다시 뽑는다(거절 샘플링). 후보를 걸러 목록을 새로 만들지 않으므로
+        한 번 뽑는 비용은 O(1)이고, 후보가 거의 다 최근 항목이면 MAX_PICK_ATTEMPTS번 뒤 그대로 쓴다.
+        """
+        snapshot = self.current()
+        candidates = snapshot.find(text) if text else snapshot.items
+        if not candidates:
+            return None
+        return self._choose(lambda: random.choice(candidates), recent)
+
+    @staticmethod
+    def _choose(draw, recent):
+        item = draw()
+        for _ in range(MAX_PICK_ATTEMPTS - 1):
+            if item["name"] not in recent or random.random() < MENU_RECENT_WEIGHT:
+                break
+            item = draw()
+        return item
+
+
+lunch_menu = MenuCatalog("lunch_items.json")
+dinner_menu = MenuCatalog("dinner_items.json")
+anju_menu = MenuCatalog("anju_items.json")
+
+# 채널·명령별 최근 추천 기록 (MENU_HISTORY_DB를 설정하면 SQLite에 유지)
+get_pick_history = per_process(PickHistory)
+
+def recommend(catalog, command, text):
+    """같은 채널에서 최근 추천한 메뉴를 피해서 고르고 기록한다."""
+    channel_id = request.form.get("channel_id", "")
+    history = get_pick_history()
+    selected = catalog.pick(text, history.recent(command, channel_id))
+    if selected is not None:
+        history.record(command, channel_id, selected["name"])
+    return selected
 
 
 @lunch_bp.route("/lunch", methods=["POST"])
 def lunch():
     text = request.form.get("text", "").strip().lower()
 
-    if text:
-        filtered = [item for item in lunch_items if text in [t.lower() for t in item["tags"]]]
-        if not filtered:
-            return jsonify({"text": f"❗ '{text}'에 해당하는 점심 메뉴가 없습니다."})
-    else:
-        filtered = lunch_items
+    selected = recommend(lunch_menu, "lunch", text)
+    if selected is None:
+        return jsonify({"text": f"❗ '{text}'에 해당하는 점심 메뉴가 없습니다."})
 
-    selected = random.choice(filtered)
     return jsonify({
         "response_type": "in_channel",
         "text": f"🍱오늘의 점심 추천: *{selected['name']}* #{text}" if text else f"🍱 전체 메뉴 중 추천된 점심: *{selected['name']}*"
@@ -44,14 +184,10 @@ def lunch():
 def dinner():
     text = request.form.get("text", "").strip().lower()
 
-    if text:
-        filtered = [item for item in dinner_items if text in [t.lower() for t in item["tags"]]]
-        if not filtered:
-            return jsonify({"text": f"❗ '{text}'에 해당하는 저녁 메뉴가 없습니다."})
-    else:
-        filtered = dinner_items
+    selected = recommend(dinner_menu, "dinner", text)
+    if selected is None:
+        return jsonify({"text": f"❗ '{text}'에 해당하는 저녁 메뉴가 없습니다."})
 
-    selected = random.choice(filtered)
     return jsonify({
         "response_type": "in_channel",
         "text": f"🍽️ 오늘의 저녁 추천: *{selected['name']}* #{text}" if text else f"🍽️ 전체 메뉴 중 추천된 저녁: *{selected['name']}*"
@@ -62,14 +198,10 @@ def dinner():
 def anju():
     text = request.form.get("text", "").strip().lower()
 
-    if text:
-        filtered = [item for item in anju_items if text in [t.lower() for t in item["tags"]]]
-        if not filtered:
-            return jsonify({"text": f"❗ '{text}'에 해당하는 안주 메뉴가 없습니다."})
-    else:
-        filtered = anju_items
+    selected = recommend(anju_menu, "anju", text)
+    if selected is None:
+        return jsonify({"text": f"❗ '{text}'에 해당하는 안주 메뉴가 없습니다."})
 
-    selected = random.choice(filtered)
     return jsonify({
         "response_type": "in_channel",
         "text": f"🍢 오늘의 안주 추천: *{selected['name']}* #{text}" if text else f"🍢 전체 메뉴 중 추천된 안주: *{selected['name']}*"
@@ -1,20 +1,24 @@
 from flask import Blueprint, request, jsonify
-from apscheduler.schedulers.background import BackgroundScheduler
-from slack_sdk import WebClient
 from datetime import datetime, timedelta
+import logging
 import pytz
-import os
 import re
 
-noticesc_bp = Blueprint("notice", __name__)
-scheduler = BackgroundScheduler()
-scheduler.start()
+from services.scheduler import register_job
+from services.notice_store import NoticeStore, ceil_to_minute, get_leader_lock
+from services.workspaces import get_workspace, is_default_workspace
+from services.metrics import observe_job_lag
+from services.idempotency import idempotent
+from services.lazy import per_process
 
-slack_token = os.environ["SLACK_BOT_TOKEN"]
-slack_client = WebClient(token=slack_token)
+noticesc_bp = Blueprint("notice", __name__)
+logger = logging.getLogger(__name__)
 
 KST = pytz.timezone("Asia/Seoul")
 
+# 워커 프로세스마다 처음 사용할 때 연다 (잠금 파일 핸들을 fork로 공유하지 않도록)
+get_notice_store = per_process(NoticeStore)
+
 def parse_smart_time(input_str: str) -> datetime:
     now = datetime.now(KST)
 
@@ -41,34 +45,63 @@ def parse_smart_time(input_str: str) -> datetime:
 
     raise ValueError("지원되지 않는 시간 형식입니다.")
 
-def send_scheduled_message(channel_id, message):
-    slack_client.chat_postMessage(channel=channel_id, text=message)
+def send_scheduled_message(channel_id, message, team_id=None):
+    return get_workspace(team_id).post_message(channel_id, message)
+
+def _record_result(notice):
+    def callback(future):
+        notice_store = get_notice_store()
+        error = future.exception()
+        if error is None:
+            notice_store.mark_sent(notice["id"])
+            # 예약 시각 대비 실제 전송 지연
+            observe_job_lag("notice_delivery", datetime.fromtimestamp(notice["run_at"], KST))
+        else:
+            notice_store.mark_failed(notice["id"], error)
+    return callback
+
+def dispatch_due_notices():
+    """리더 프로세스에서만 실행: 전송 시각이 된 예약 공지를 모아서 보낸다."""
+    leader_lock = get_leader_lock()
+    notice_store = get_notice_store()
+    if not leader_lock.is_leader:
+        if not leader_lock.acquire():
+            return
+        notice_store.requeue_interrupted()
+
+    # 같은 분에 도래한 공지를 한꺼번에 대기열에 넣고, 결과는 전송 완료 시 기록
+    for notice in notice_store.claim_due():
+        try:
+            delivery = send_scheduled_message(notice["channel_id"], notice["message"], notice["team_id"])
+        except Exception as e:
+            # 설치 정보가 삭제된 워크스페이스 등
+            notice_store.mark_failed(notice["id"], e)
+            continue
+        delivery.future.add_done_callback(_record_result(notice))
+
+# 매 분 0초에 그 분까지 도래한 공지를 한꺼번에 전송
+register_job(dispatch_due_notices, "cron", id="notice_dispatch", second=0)
 
-def find_channel_by_partial_name(partial_name):
+def find_channel_by_partial_name(partial_name, team_id=None):
     try:
-        response = slack_client.conversations_list()
-        channel_id = None
-        matched_channel = None
-        for ch in response["channels"]:
-            if partial_name in ch["name"]:
-                channel_id = ch["id"]
-                matched_channel = ch["name"]
-                return matched_channel, channel_id
-                break
-
-        if not channel_id:
-            return jsonify({"text": f"❗ 채널을 찾을 수 없습니다: `{partial_name}`"})
-
+        return get_workspace(team_id).channels.find(partial_name)
     except Exception as e:
-        print("채널 검색 오류:", e)
-    return None
+        logger.warning("채널 검색 오류: %s", e)
+    return None, None
 
 @noticesc_bp.route("/noticesc", methods=["POST"])
+@idempotent
 def schedule_notice():
     text = request.form.get("text", "").strip()
     user_channel = request.form.get("channel_id")
+    team_id = request.form.get("team_id")
 
     try:
+        if text == "list":
+            return list_notices(team_id)
+        if text.split(" ", 1)[0] == "cancel":
+            return cancel_notice(text[len("cancel"):].strip(), team_id)
+
         parts = text.split(" ", 2)
 
         if len(parts) < 2:
@@ -78,9 +111,9 @@ def schedule_notice():
         if len(parts) == 3 and re.fullmatch(r"\d{1,3}|\d{1,2}:\d{2}|\d{8}", parts[1]):
             channel_input = parts[0].lstrip("#")
             time_str = parts[1]
-            message = " ".join(parts[1:])
+            message = parts[2]
 
-            mached_channel, channel_id = find_channel_by_partial_name(channel_input)
+            mached_channel, channel_id = find_channel_by_partial_name(channel_input, team_id)
             if channel_id is None:
                 return jsonify(response_type="ephemeral", text=f"❗ 채널 `{channel_input}` 을 찾을 수 없습니다.")
         else:
@@ -88,26 +121,44 @@ def schedule_notice():
             time_str = parts[0]
             message = " ".join(parts[1:])
             channel_id = user_channel
+            mached_channel = f"#{channel_id}"
 
         try:
             target_time = parse_smart_time(time_str)
         except ValueError as e:
             return jsonify(response_type="ephemeral", text=f"❗ 시간 형식 오류: {e}")
 
-        scheduler.add_job(
-            send_scheduled_message,
-            trigger="date",
-            run_date=target_time,
-            args=[channel_id, message]
+        notice_id = get_notice_store().add(
+            channel_id, mached_channel, message, target_time.timestamp(), request.form.get("user_id"), team_id
         )
 
-        formatted_time = target_time.strftime("%Y-%m-%d %H:%M")
+        # 저장된(분 단위로 올린) 전송 시각을 안내
+        formatted_time = datetime.fromtimestamp(ceil_to_minute(target_time.timestamp()), KST).strftime("%Y-%m-%d %H:%M")
         return jsonify(
             response_type="ephemeral",
-            text=f"✅ {formatted_time} 에 공지 예약 완료 (채널: <{mached_channel}>)"
+            text=f"✅ {formatted_time} 에 공지 예약 완료 (채널: <{mached_channel}>, 번호: {notice_id})"
         )
 
     except Exception as e:
         return jsonify(response_type="ephemeral", text=f"❗ 예약 실패: {str(e)}")
 
+def list_notices(team_id=None):
+    # team_id 없이 저장된 이전 공지는 기본 워크스페이스에서만 보인다
+    notices = get_notice_store().pending(team_id=team_id, include_legacy=is_default_workspace(team_id))
+    if not notices:
+        return jsonify(response_type="ephemeral", text="📭 예약된 공지가 없습니다.")
+    lines = []
+    for n in notices:
+        run_at = datetime.fromtimestamp(n["run_at"], KST).strftime("%m-%d %H:%M")
+        preview = n["message"] if len(n["message"]) <= 40 else n["message"][:40] + "…"
+        lines.append(f"`{n['id']}` {run_at} <{n['channel_name'] or n['channel_id']}> {preview}")
+    return jsonify(response_type="ephemeral", text="🗓️ 예약된 공지\n" + "\n".join(lines))
+
+def cancel_notice(id_str, team_id=None):
+    if not id_str.isdigit():
+        return jsonify(response_type="ephemeral", text="❗ 형식 오류: `/예약공지 cancel [번호]`")
+    if get_notice_store().cancel(int(id_str), team_id, include_legacy=is_default_workspace(team_id)):
+        return jsonify(response_type="ephemeral", text=f"🗑️ {id_str}번 예약 공지를 취소했습니다.")
+    return jsonify(response_type="ephemeral", text=f"❗ 취소할 수 있는 {id_str}번 예약 공지가 없습니다.")
+
 __all__ = ["noticesc_bp"]
@@ -1,10 +1,27 @@
 # weather.py
 import os
 import datetime
+import json
+import logging
+import asyncio
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from bisect import bisect_left, bisect_right
 import requests
 from flask import Blueprint, request, jsonify
 
+from services.scheduler import register_job
+from services.deferred import deferred
+from services.metrics import track_upstream, log_sampled
+from services.http import get_http_session, HTTP_TIMEOUT
+from services.kma_grid import load_places
+from services.lazy import per_process
+from services.forecast_store import get_forecast_store
+from services.notice_store import get_leader_lock
+
 weather_bp = Blueprint('weather', __name__)
+logger = logging.getLogger(__name__)
 
 # 사전 지정된 지역명→기상청 그리드 좌표 맵
 LOCATION_MAP = {
@@ -14,8 +31,19 @@ LOCATION_MAP = {
     # … 필요에 따라 추가
 }
 
-# 기상청 서비스 키는 환경 변수로 관리
-SERVICE_KEY = os.environ["KMA_SERVICE_KEY"]
+# 지명 사전(data/weather_places.json)의 위경도를 적재 시 한 번만 격자로 변환해 둔다.
+# 직접 지정한 LOCATION_MAP 좌표가 우선한다.
+PLACES, PLACE_GROUPS = load_places()
+PLACES.update(LOCATION_MAP)
+
+# 여러 지역 조회 시 동시에 보낼 최대 예보 요청 수
+WEATHER_FETCH_CONCURRENCY = int(os.environ.get("WEATHER_FETCH_CONCURRENCY", "8"))
+
+
+# 단기예보 API 주소 (벤치마크 등에서 로컬 스텁으로 교체 가능)
+KMA_API_URL = os.environ.get(
+    "KMA_API_URL", "https://apis.data.go.kr/1360000/VilageFcstInfoService_2.0/getVilageFcst"
+)
 
 # 단기예보 발표 시각 리스트
 RELEASE_TIMES = ["0200", "0500", "0800", "1100", "1400", "1700", "2000", "2300"]
@@ -33,10 +61,23 @@ def get_base_datetime(target_dt=None):
         return prev_date, "2300"
     return datestr, past[-1]
 
-def call_short_term_forecast(base_date, base_time, nx, ny):
-    url = "https://apis.data.go.kr/1360000/VilageFcstInfoService_2.0/getVilageFcst"
-    params = {
-        "serviceKey": SERVICE_KEY,
+def next_release_datetime(base_date, base_time):
+    """발표시각(base_date, base_time) 다음 발표시각을 datetime으로 반환."""
+    base_dt = datetime.datetime.strptime(base_date + base_time, "%Y%m%d%H%M")
+    later = [t for t in RELEASE_TIMES if t > base_time]
+    if later:
+        return base_dt.replace(hour=int(later[0][:2]), minute=int(later[0][2:]))
+    first = RELEASE_TIMES[0]
+    return (base_dt + datetime.timedelta(days=1)).replace(hour=int(first[:2]), minute=int(first[2:]))
+
+def forecast_params(base_date, base_time, nx, ny):
+    # 기상청 서비스 키는 환경 변수로 관리 (import 시점이 아닌 호출 시점에 확인)
+    service_key = os.environ.get("KMA_SERVICE_KEY")
+    if not service_key:
+        raise RuntimeError("KMA_SERVICE_KEY 환경 변수가 설정되지 않았습니다.")
+
+    return {
+        "serviceKey": service_key,
         "pageNo": "1",
         "numOfRows": "1000",
         "dataType": "JSON",
@@ -45,55 +86,351 @@ def call_short_term_forecast(base_date, base_time, nx, ny):
         "nx": str(nx),
         "ny": str(ny),
     }
-    resp = requests.get(url, params=params)
-    
-    # ① 상태 코드 확인
-    print(">>> API status_code:", resp.status_code)
-    # ② 실제 응답 본문(텍스트) 확인
-    print(">>> API response text:", resp.text[:500])  # 앞 500자만
 
+def check_forecast_response(status, body, nx, ny, base):
+    """응답 확인용 로그는 표본으로만 남기고, 비정상 응답은 항상 남긴다."""
+    log_sampled(
+        logger, "kma_response", rate=None if status == 200 else 1.0,
+        status=status, nx=nx, ny=ny, base=base, bytes=len(body), head=body[:200],
+    )
     # 비정상 응답이면 적절히 처리
-    if resp.status_code != 200:
-        raise RuntimeError(f"API 요청 실패: status={resp.status_code}")
+    if status != 200:
+        raise RuntimeError(f"API 요청 실패: status={status}")
+
+def call_short_term_forecast(base_date, base_time, nx, ny):
+    params = forecast_params(base_date, base_time, nx, ny)
+    with track_upstream("kma", "getVilageFcst") as call:
+        try:
+            resp = get_http_session().get(KMA_API_URL, params=params, timeout=HTTP_TIMEOUT)
+        except requests.RequestException as e:
+            call.status = e.__class__.__name__
+            raise RuntimeError(f"API 요청 실패: {e.__class__.__name__}")
+        call.status = resp.status_code
+        check_forecast_response(resp.status_code, resp.text, nx, ny, f"{base_date}{base_time}")
 
     try:
         return resp.json()
     except ValueError:
         raise RuntimeError(f"JSON 파싱 실패, 원본문:\n{resp.text}")
 
-def extract_weather(json_data, fcst_date, fcst_time):
-    """예보 데이터에서 기온(TMP)과 하늘상태(SKY)를 추출."""
-    items = json_data['response']['body']['items']['item']
-    tmp = next((i['fcstValue'] for i in items
-                if i['category']=="TMP" and i['fcstDate']==fcst_date and i['fcstTime']==fcst_time), None)
-    sky_code = next((i['fcstValue'] for i in items
-                     if i['category']=="SKY" and i['fcstDate']==fcst_date and i['fcstTime']==fcst_time), None)
-    sky_map = {"1":"맑음", "3":"구름많음", "4":"흐림"}
-    return tmp, sky_map.get(sky_code, "알수없음")
+async def acall_short_term_forecast(session, base_date, base_time, nx, ny):
+    """비동기 실행 모드용: 공용 aiohttp 세션(keep-alive 연결 풀)으로 조회."""
+    from services.aio import aiohttp
 
+    params = forecast_params(base_date, base_time, nx, ny)
+    with track_upstream("kma", "getVilageFcst") as call:
+        try:
+            async with session.get(KMA_API_URL, params=params) as resp:
+                body = await resp.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            call.status = e.__class__.__name__
+            raise RuntimeError(f"API 요청 실패: {e.__class__.__name__}")
+        call.status = resp.status
+        check_forecast_response(resp.status, body, nx, ny, f"{base_date}{base_time}")
 
+    try:
+        return json.loads(body)
+    except ValueError:
+        raise RuntimeError(f"JSON 파싱 실패, 원본문:\n{body}")
 
-@weather_bp.route("/weather", methods=["POST"])
-def slack_weather():
-    text = request.form.get("text", "").strip()
-    now = datetime.datetime.now()
+class ForecastCache:
+    """(base_date, base_time, nx, ny) 단위 예보 캐시. 다음 발표시각에 만료되고, 같은 키의 동시 요청은 한 번만 조회한다."""
 
-    # 기본 처리
-    if text == "":
-        loc, when = "학교", "오늘"
-        fcst_dt = now
-    elif text in ("내일", "모레"):
-        days = {"내일":1, "모레":2}[text]
-        loc, when = "학교", text
-        fcst_dt = now + datetime.timedelta(days=days)
-    elif text in LOCATION_MAP:
-        loc, when = text, "오늘"
-        fcst_dt = now
-    else:
-        return jsonify(
-            response_type="ephemeral",
-            text=f"지원하지 않는 입력입니다: `{text}`\n사용법: `/날씨 [지역명|내일|모레]`"
-        )
+    def __init__(self, loader):
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._entries = {}    # key → (만료시각, 응답)
+        self._inflight = {}   # key → (Event, 결과 dict)
+        self._ainflight = {}  # key → asyncio.Task (비동기 실행 모드, 이벤트 루프 스레드 전용)
+
+    def get(self, base_date, base_time, nx, ny):
+        key = (base_date, base_time, nx, ny)
+        now = datetime.datetime.now()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+            waiting = self._inflight.get(key)
+            if waiting is None:
+                waiting = (threading.Event(), {})
+                self._inflight[key] = waiting
+                leader = True
+            else:
+                leader = False
+
+        event, result = waiting
+        if not leader:
+            event.wait()
+            if "error" in result:
+                raise result["error"]
+            return result["data"]
+
+        try:
+            data = self.loader(base_date, base_time, nx, ny)
+            result["data"] = data
+            expires = next_release_datetime(base_date, base_time)
+            with self._lock:
+                self._purge(now)
+                self._entries[key] = (expires, data)
+            return data
+        except Exception as e:
+            result["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    async def aget(self, base_date, base_time, nx, ny, aloader):
+        """비동기 실행 모드용 get. 같은 키의 동시 요청은 하나의 Task를 함께 기다린다."""
+        key = (base_date, base_time, nx, ny)
+        now = datetime.datetime.now()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[0] > now:
+            return entry[1]
+
+        task = self._ainflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(aloader(base_date, base_time, nx, ny))
+            self._ainflight[key] = task
+            task.add_done_callback(lambda _: self._ainflight.pop(key, None))
+        data = await asyncio.shield(task)
+
+        expires = next_release_datetime(base_date, base_time)
+        with self._lock:
+            self._purge(now)
+            self._entries[key] = (expires, data)
+        return data
+
+    def _purge(self, now):
+        expired = [k for k, (expires, _) in self._entries.items() if expires <= now]
+        for k in expired:
+            del self._entries[k]
+
+def is_valid_response(json_data):
+    """기상청 응답 코드가 정상(00)인지 확인."""
+    try:
+        return json_data['response']['header']['resultCode'] == "00"
+    except (KeyError, TypeError):
+        return False
+
+class ForecastIndex:
+    """예보 응답을 (fcstDate, fcstTime) 행 × 카테고리 열 형태로 한 번만 정리한 색인."""
+
+    def __init__(self, items):
+        slots = sorted({(i['fcstDate'], i['fcstTime']) for i in items})
+        self.slots = slots
+        self._row = {slot: n for n, slot in enumerate(slots)}
+        self.columns = {}
+        for i in items:
+            column = self.columns.get(i['category'])
+            if column is None:
+                column = self.columns[i['category']] = [None] * len(slots)
+            column[self._row[(i['fcstDate'], i['fcstTime'])]] = i['fcstValue']
+
+    @classmethod
+    def from_response(cls, json_data):
+        if not is_valid_response(json_data):
+            header = json_data.get('response', {}).get('header', {}) if isinstance(json_data, dict) else {}
+            raise RuntimeError(f"예보 응답 오류: {header.get('resultCode')} {header.get('resultMsg')}")
+        return cls(json_data['response']['body']['items']['item'])
+
+    def value(self, category, fcst_date, fcst_time):
+        """특정 시각의 카테고리 값. 없으면 None."""
+        row = self._row.get((fcst_date, fcst_time))
+        column = self.columns.get(category)
+        if row is None or column is None:
+            return None
+        return column[row]
+
+    def timeline(self, start, end, categories=("TMP", "SKY", "POP", "PTY")):
+        """start ≤ (fcstDate, fcstTime) ≤ end 구간의 시각별 값 목록."""
+        lo = bisect_left(self.slots, start)
+        hi = bisect_right(self.slots, end)
+        return [
+            (self.slots[n], {c: self.columns[c][n] for c in categories if c in self.columns})
+            for n in range(lo, hi)
+        ]
+
+def load_forecast_index(base_date, base_time, nx, ny):
+    """다른 워커가 받아 둔 응답이 있으면 쓰고, 없으면 기상청에서 받아 함께 쓰도록 저장한다."""
+    store = get_forecast_store()
+    data = store.get(base_date, base_time, nx, ny)
+    if data is not None:
+        return ForecastIndex.from_response(data)
+    data = call_short_term_forecast(base_date, base_time, nx, ny)
+    index = ForecastIndex.from_response(data)
+    store.put(base_date, base_time, nx, ny, data, next_release_datetime(base_date, base_time).timestamp())
+    return index
+
+async def aload_forecast_index(base_date, base_time, nx, ny):
+    from services.aio import get_runtime
+
+    # SQLite 조회·저장은 이벤트 루프를 막지 않도록 기본 스레드 풀에서
+    loop = asyncio.get_running_loop()
+    store = await loop.run_in_executor(None, get_forecast_store)
+    data = await loop.run_in_executor(None, store.get, base_date, base_time, nx, ny)
+    if data is not None:
+        return ForecastIndex.from_response(data)
+    data = await acall_short_term_forecast(get_runtime().session, base_date, base_time, nx, ny)
+    index = ForecastIndex.from_response(data)
+    expires_at = next_release_datetime(base_date, base_time).timestamp()
+    await loop.run_in_executor(None, store.put, base_date, base_time, nx, ny, data, expires_at)
+    return index
+
+forecast_cache = ForecastCache(load_forecast_index)
+
+def grid_cells(locs):
+    """지역 목록을 중복 없는 (nx, ny) 목록으로 변환. 같은 격자의 지역은 한 번만 조회한다."""
+    return list(dict.fromkeys((PLACES[loc]["nx"], PLACES[loc]["ny"]) for loc in locs))
+
+get_fetch_pool = per_process(
+    lambda: ThreadPoolExecutor(max_workers=WEATHER_FETCH_CONCURRENCY, thread_name_prefix="weather")
+)
+
+def fetch_indexes(base_date, base_time, cells):
+    """격자별 예보 색인을 동시에 조회해 {(nx, ny): 색인 또는 예외}를 반환."""
+    def fetch(cell):
+        try:
+            return forecast_cache.get(base_date, base_time, *cell)
+        except Exception as e:
+            return e
+
+    if len(cells) == 1:
+        return {cells[0]: fetch(cells[0])}
+    return dict(zip(cells, get_fetch_pool().map(fetch, cells)))
+
+async def afetch_indexes(base_date, base_time, cells):
+    """비동기 실행 모드용 fetch_indexes."""
+    results = await asyncio.gather(
+        *(forecast_cache.aget(base_date, base_time, nx, ny, aload_forecast_index) for nx, ny in cells),
+        return_exceptions=True,
+    )
+    return dict(zip(cells, results))
+
+def prefetch_forecasts():
+    """발표 직후 LOCATION_MAP 좌표의 예보를 미리 받아 둔다.
+
+    리더 워커(예약 공지 전송을 맡은 워커)만 기상청을 부르고, 받은 응답은 예보 캐시 DB로 다른 워커와 나눈다.
+    """
+    if not get_leader_lock().is_leader:
+        return
+    base_date, base_time = get_base_datetime()
+    for cell, result in fetch_indexes(base_date, base_time, grid_cells(LOCATION_MAP)).items():
+        if isinstance(result, Exception):
+            logger.warning("예보 선조회 실패: %s %s", cell, result)
+
+# 기상청 API는 발표시각 약 10분 후부터 제공되므로 그 직후 선조회
+register_job(
+    prefetch_forecasts,
+    "cron",
+    id="weather_prefetch",
+    hour=",".join(str(int(t[:2])) for t in RELEASE_TIMES),
+    minute=11,
+)
+
+SKY_MAP = {"1":"맑음", "3":"구름많음", "4":"흐림"}
+PTY_MAP = {"0":"없음", "1":"비", "2":"비/눈", "3":"눈", "4":"소나기"}
+# 한 지역 예보에 함께 보여 줄 이후 시간대 수
+TIMELINE_HOURS = 6
+
+def extract_weather(index, fcst_date, fcst_time):
+    """예보 색인에서 기온(TMP)과 하늘상태(SKY)를 추출."""
+    tmp = index.value("TMP", fcst_date, fcst_time)
+    sky_code = index.value("SKY", fcst_date, fcst_time)
+    return tmp, SKY_MAP.get(sky_code, "알수없음")
+
+
+
+WHEN_DAYS = {"오늘": 0, "내일": 1, "모레": 2}
+USAGE_TEXT = "사용법: `/날씨 [지역명 ...|전국] [오늘|내일|모레]`"
+
+def parse_weather_text(text, now):
+    """입력을 (제목, 지역 목록, 시점, 예보 기준 datetime)으로 해석. 모르는 단어가 있으면 (None, 모르는 단어 목록)."""
+    when, names, unknown = "오늘", [], []
+    for token in text.split():
+        if token in WHEN_DAYS:
+            when = token
+        elif token in PLACE_GROUPS or token in PLACES:
+            names.append(token)
+        else:
+            unknown.append(token)
+    if unknown:
+        return None, unknown
+    if not names:
+        names = ["학교"]
+
+    # 묶음을 펼치고 순서를 유지한 채 중복 제거
+    locs = []
+    for name in names:
+        locs.extend(PLACE_GROUPS.get(name, [name]))
+    locs = list(dict.fromkeys(locs))
+    return " ".join(dict.fromkeys(names)), locs, when, now + datetime.timedelta(days=WHEN_DAYS[when])
+
+def weather_message(loc, when, index, fcst_date, fcst_time):
+    tmp, sky = extract_weather(index, fcst_date, fcst_time)
+    pop = index.value("POP", fcst_date, fcst_time)
+    pty = index.value("PTY", fcst_date, fcst_time)
+
+    message = (
+        f"*{loc} {when} {fcst_time}시 예보*\n"
+        f"> 기온: {tmp}℃\n"
+        f"> 날씨: {sky}"
+    )
+    if pop is not None:
+        message += f"\n> 강수확률: {pop}%"
+    if pty not in (None, "0"):
+        message += f" ({PTY_MAP.get(pty, pty)})"
+
+    # 같은 날 이후 시간대 요약 (비/눈이 오면 하늘상태 대신 표시)
+    upcoming = index.timeline((fcst_date, fcst_time), (fcst_date, "2300"))[1:1 + TIMELINE_HOURS]
+    if upcoming:
+        slots = []
+        for (_, slot_time), values in upcoming:
+            slot_pty = values.get("PTY")
+            state = PTY_MAP.get(slot_pty, slot_pty) if slot_pty not in (None, "0") else SKY_MAP.get(values.get("SKY"), "-")
+            slots.append(f"{slot_time[:2]}시 {values.get('TMP', '-')}℃ {state}")
+        message += "\n> 이후: " + " · ".join(slots)
+    return message
+
+def _width(text):
+    """고정폭 글꼴에서의 표시 폭. 한글(전각) 문자는 2칸."""
+    return sum(2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in text)
+
+def _pad(text, width):
+    return text + " " * max(width - _width(text), 0)
+
+def weather_table(title, when, locs, indexes, fcst_date, fcst_time):
+    """여러 지역의 예보를 하나의 고정폭 표로 만든다."""
+    rows = [("지역", "기온", "날씨", "강수")]
+    for loc in locs:
+        index = indexes[(PLACES[loc]["nx"], PLACES[loc]["ny"])]
+        if isinstance(index, Exception):
+            rows.append((loc, "-", "조회 실패", "-"))
+            continue
+        tmp, sky = extract_weather(index, fcst_date, fcst_time)
+        pop = index.value("POP", fcst_date, fcst_time)
+        pty = index.value("PTY", fcst_date, fcst_time)
+        rain = "-" if pop is None else f"{pop}%"
+        if pty not in (None, "0"):
+            rain += f" {PTY_MAP.get(pty, pty)}"
+        rows.append((loc, "-" if tmp is None else f"{tmp}℃", sky, rain))
+
+    widths = [max(_width(row[n]) for row in rows) for n in range(3)]
+    lines = ["  ".join(_pad(cell, w) for cell, w in zip(row[:3], widths)) + "  " + row[3] for row in rows]
+    return f"*{title} {when} {fcst_time}시 예보*\n```\n" + "\n".join(lines) + "\n```"
+
+def plan_weather(text):
+    """(오류 응답, 제목, 지역 목록, 시점, base_date, base_time, fcst_date, fcst_time)."""
+    now = datetime.datetime.now()
+    parsed = parse_weather_text(text, now)
+    if parsed[0] is None:
+        return {
+            "response_type": "ephemeral",
+            "text": f"지원하지 않는 지역 또는 입력입니다: `{' '.join(parsed[1])}`\n{USAGE_TEXT}",
+        }, None, None, None, None, None, None, None
+    title, locs, when, fcst_dt = parsed
 
     base_date, base_time = get_base_datetime(now)
     fcst_date = fcst_dt.strftime("%Y%m%d")
@@ -103,14 +440,36 @@ def slack_weather():
         fcst_time = fcst_dt.strftime("%H00")
     else:
         fcst_time = "1400"
+    return None, title, locs, when, base_date, base_time, fcst_date, fcst_time
 
-    coords = LOCATION_MAP[loc]
-    data = call_short_term_forecast(base_date, base_time, coords["nx"], coords["ny"])
-    tmp, sky = extract_weather(data, fcst_date, fcst_time)
+def weather_reply(title, locs, when, indexes, fcst_date, fcst_time):
+    """지역이 하나면 기존 형식으로, 여럿이면 표로 응답."""
+    if len(locs) == 1:
+        index = next(iter(indexes.values()))
+        if isinstance(index, Exception):
+            return {"response_type": "ephemeral", "text": f"⚠️ 예보 조회 실패: {index}"}
+        return {"response_type": "in_channel", "text": weather_message(locs[0], when, index, fcst_date, fcst_time)}
+    if all(isinstance(index, Exception) for index in indexes.values()):
+        return {"response_type": "ephemeral", "text": f"⚠️ 예보 조회 실패: {next(iter(indexes.values()))}"}
+    return {"response_type": "in_channel", "text": weather_table(title, when, locs, indexes, fcst_date, fcst_time)}
 
-    message = (
-        f"*{loc} {when} {fcst_time}시 예보*\n"
-        f"> 기온: {tmp}℃\n"
-        f"> 날씨: {sky}"
-    )
-    return jsonify(response_type="in_channel", text=message)
+async def slack_weather_async(form):
+    """비동기 실행 모드: 예보 조회를 이벤트 루프에서 기다린다."""
+    error, title, locs, when, base_date, base_time, fcst_date, fcst_time = plan_weather(form.get("text", "").strip())
+    if error:
+        return error
+
+    indexes = await afetch_indexes(base_date, base_time, grid_cells(locs))
+    return weather_reply(title, locs, when, indexes, fcst_date, fcst_time)
+
+@weather_bp.route("/weather", methods=["POST"])
+@deferred(async_view=slack_weather_async)
+def slack_weather():
+    text = request.form.get("text", "").strip()
+
+    error, title, locs, when, base_date, base_time, fcst_date, fcst_time = plan_weather(text)
+    if error:
+        return jsonify(error)
+
+    indexes = fetch_indexes(base_date, base_time, grid_cells(locs))
+    return jsonify(weather_reply(title, locs, when, indexes, fcst_date, fcst_time))
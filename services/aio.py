@@ -0,0 +1,71 @@
+# aio.py
+import asyncio
+import os
+import threading
+
+try:
+    import aiohttp
+    from slack_sdk.web.async_client import AsyncWebClient
+except ImportError:  # aiohttp가 없으면 비동기 실행 모드를 쓰지 않는다
+    aiohttp = None
+
+from services.http import HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_POOL_SIZE
+from services.lazy import per_process
+
+# "1"이면 비동기 구현이 있는 명령을 이벤트 루프에서 처리
+ASYNC_MODE = os.environ.get("ASYNC_MODE", "0") == "1"
+# 이벤트 루프에서 동시에 진행할 수 있는 최대 명령 수
+ASYNC_MAX_IN_FLIGHT = int(os.environ.get("ASYNC_MAX_IN_FLIGHT", "500"))
+
+
+def async_enabled():
+    return ASYNC_MODE and aiohttp is not None
+
+
+class AsyncRuntime:
+    """프로세스별 이벤트 루프 스레드와 keep-alive 연결 풀(aiohttp 세션).
+
+    워크스페이스별 AsyncWebClient는 이 세션을 함께 쓴다 (services.workspaces). 현재 비동기로 호출하는
+    Slack API는 conversations.list뿐이고, 메시지 전송은 전송 대기열의 PooledWebClient가 맡는다.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.in_flight = 0
+        self._count_lock = threading.Lock()
+        self._ready = threading.Event()
+        threading.Thread(target=self._run, name="async-runtime", daemon=True).start()
+        self._ready.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._setup())
+        self._ready.set()
+        self.loop.run_forever()
+
+    async def _setup(self):
+        # 세션은 루프 안에서 만들어야 한다
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=HTTP_POOL_SIZE * 4, limit_per_host=HTTP_POOL_SIZE, keepalive_timeout=30),
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=HTTP_CONNECT_TIMEOUT, sock_read=HTTP_READ_TIMEOUT),
+        )
+
+    def submit(self, coro):
+        """코루틴을 이벤트 루프에 넣는다. 동시 진행 한도를 넘으면 None."""
+        with self._count_lock:
+            if self.in_flight >= ASYNC_MAX_IN_FLIGHT:
+                coro.close()
+                return None
+            self.in_flight += 1
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._count_lock:
+            self.in_flight -= 1
+
+
+get_runtime = per_process(AsyncRuntime)
+
+__all__ = ["AsyncRuntime", "async_enabled", "get_runtime", "ASYNC_MODE"]
@@ -0,0 +1,228 @@
+# channel_directory.py
+import asyncio
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+
+from services.metrics import track_upstream
+
+# 채널 목록 캐시 유지 시간(초). 이벤트로 갱신되지 않는 변경은 이 주기로 반영된다.
+CHANNEL_CACHE_TTL = int(os.environ.get("CHANNEL_CACHE_TTL", "600"))
+# 조회 실패 시 강제 재조회 최소 간격(초). 새 채널 생성 직후 검색을 위해 사용
+MISS_REFRESH_INTERVAL = 60
+PAGE_LIMIT = 1000
+
+
+def _ngrams(name):
+    """부분 문자열 색인용 키(1글자 + 2글자 조각)를 반환."""
+    grams = set(name)
+    grams.update(name[i:i + 2] for i in range(len(name) - 1))
+    return grams
+
+
+class ChannelDirectory:
+    """conversations.list 전체 페이지를 캐시하고 채널명 부분 검색 색인을 유지한다."""
+
+    def __init__(self, client, ttl=CHANNEL_CACHE_TTL):
+        self.client = client
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._channels = []   # 순번 → {"id", "name"} (삭제된 자리는 None)
+        self._by_id = {}      # 채널 ID → 순번
+        self._index = {}      # n-gram → 순번 집합
+        self._sorted = []     # (채널명, 순번) 정렬 목록. 접두어 검색용
+        self._arefresh_task = None
+        self._loaded_at = 0.0
+
+    # ----- 적재 -----
+    def _fetch_all(self):
+        channels = []
+        cursor = None
+        while True:
+            with track_upstream("slack", "conversations.list"):
+                response = self.client.conversations_list(
+                    limit=PAGE_LIMIT, exclude_archived=True, cursor=cursor
+                )
+            channels.extend({"id": ch["id"], "name": ch["name"]} for ch in response["channels"])
+            cursor = (response.get("response_metadata") or {}).get("next_cursor")
+            if not cursor:
+                return channels
+
+    def refresh(self):
+        """Slack에서 전체 채널 목록을 다시 받아 색인을 재구성한다."""
+        if not self._refresh_lock.acquire(blocking=False):
+            # 다른 스레드가 갱신 중이면 기존 데이터로 응답
+            if self._loaded_at:
+                return
+            self._refresh_lock.acquire()
+            self._refresh_lock.release()
+            return
+        try:
+            self._install(self._fetch_all())
+        finally:
+            self._refresh_lock.release()
+
+    async def arefresh(self, async_client):
+        """비동기 실행 모드용 refresh. AsyncWebClient로 전체 페이지를 받고, 동시 호출은 한 번만 조회한다."""
+        task = self._arefresh_task
+        if task is None or task.done():
+            task = self._arefresh_task = asyncio.ensure_future(self._arefresh(async_client))
+        await asyncio.shield(task)
+
+    async def _arefresh(self, async_client):
+        # 색인 교체까지 Task 안에서 끝내야 완료된 Task를 본 다른 요청이 다시 조회하지 않는다
+        self._install(await self._afetch_all(async_client))
+
+    async def _afetch_all(self, async_client):
+        channels = []
+        cursor = None
+        while True:
+            with track_upstream("slack", "conversations.list"):
+                response = await async_client.conversations_list(
+                    limit=PAGE_LIMIT, exclude_archived=True, cursor=cursor
+                )
+            channels.extend({"id": ch["id"], "name": ch["name"]} for ch in response["channels"])
+            cursor = (response.get("response_metadata") or {}).get("next_cursor")
+            if not cursor:
+                return channels
+
+    def _install(self, channels):
+        by_id, index = {}, {}
+        for pos, ch in enumerate(channels):
+            by_id[ch["id"]] = pos
+            for gram in _ngrams(ch["name"]):
+                index.setdefault(gram, set()).add(pos)
+        by_name = sorted((ch["name"], pos) for pos, ch in enumerate(channels))
+        with self._lock:
+            self._channels, self._by_id, self._index = channels, by_id, index
+            self._sorted = by_name
+            self._loaded_at = time.monotonic()
+
+    @property
+    def is_fresh(self):
+        return bool(self._loaded_at) and time.monotonic() - self._loaded_at <= self.ttl
+
+    @property
+    def miss_refresh_due(self):
+        """조회 실패 시 강제 재조회를 해도 되는지 (마지막 적재 후 MISS_REFRESH_INTERVAL 경과)."""
+        return time.monotonic() - self._loaded_at > MISS_REFRESH_INTERVAL
+
+    def _ensure_fresh(self):
+        if not self.is_fresh:
+            self.refresh()
+
+    def invalidate(self):
+        self._loaded_at = 0.0
+
+    # ----- 이벤트 반영 -----
+    def upsert(self, channel_id, name):
+        """channel_created / channel_rename 이벤트 반영."""
+        with self._lock:
+            pos = self._by_id.get(channel_id)
+            if pos is None:
+                pos = len(self._channels)
+                self._channels.append(None)
+                self._by_id[channel_id] = pos
+            else:
+                self._unindex(pos)
+            self._channels[pos] = {"id": channel_id, "name": name}
+            for gram in _ngrams(name):
+                self._index.setdefault(gram, set()).add(pos)
+            insort(self._sorted, (name, pos))
+
+    def remove(self, channel_id):
+        """channel_deleted / channel_archive 이벤트 반영."""
+        with self._lock:
+            pos = self._by_id.pop(channel_id, None)
+            if pos is not None:
+                self._unindex(pos)
+                self._channels[pos] = None
+
+    def _unindex(self, pos):
+        old = self._channels[pos]
+        if old is None:
+            return
+        for gram in _ngrams(old["name"]):
+            postings = self._index.get(gram)
+            if postings is not None:
+                postings.discard(pos)
+                if not postings:
+                    del self._index[gram]
+        i = bisect_left(self._sorted, (old["name"], pos))
+        if i < len(self._sorted) and self._sorted[i] == (old["name"], pos):
+            del self._sorted[i]
+
+    # ----- 조회 -----
+    def _candidates(self, partial_name):
+        if len(partial_name) == 1:
+            keys = [partial_name]
+        else:
+            keys = {partial_name[i:i + 2] for i in range(len(partial_name) - 1)}
+        postings = []
+        for key in keys:
+            found = self._index.get(key)
+            if not found:
+                return set()
+            postings.append(found)
+        postings.sort(key=len)
+        result = set(postings[0])
+        for other in postings[1:]:
+            result &= other
+            if not result:
+                break
+        return result
+
+    def _lookup(self, partial_name):
+        with self._lock:
+            for pos in sorted(self._candidates(partial_name)):
+                ch = self._channels[pos]
+                if ch is not None and partial_name in ch["name"]:
+                    return ch["name"], ch["id"]
+        return None, None
+
+    def find(self, partial_name, refresh=True):
+        """이름에 partial_name이 포함된 첫 번째 채널의 (채널명, 채널ID)를 반환. 없으면 (None, None).
+        refresh=False이면 Slack을 호출하지 않고 현재 캐시만 본다."""
+        if not partial_name:
+            return None, None
+        if refresh:
+            self._ensure_fresh()
+        name, channel_id = self._lookup(partial_name)
+        if refresh and channel_id is None and self.miss_refresh_due:
+            self.refresh()
+            name, channel_id = self._lookup(partial_name)
+        return name, channel_id
+
+    def find_prefix(self, prefix, refresh=True):
+        """prefix로 시작하는 모든 채널의 (채널명, 채널ID) 목록 (이름순)."""
+        if not prefix:
+            return []
+        if refresh:
+            self._ensure_fresh()
+        with self._lock:
+            found = []
+            for i in range(bisect_left(self._sorted, (prefix,)), len(self._sorted)):
+                name, pos = self._sorted[i]
+                if not name.startswith(prefix):
+                    break
+                found.append((name, self._channels[pos]["id"]))
+            return found
+
+    def resolve(self, targets, refresh=True):
+        """여러 대상(부분 채널명 또는 `접두어*`)을 한 번의 캐시 확인으로 찾는다.
+        대상별 [(채널명, 채널ID), ...] 목록을 순서대로 반환. 못 찾으면 빈 목록."""
+        if refresh:
+            self._ensure_fresh()
+        results = []
+        for target in targets:
+            if target.endswith("*"):
+                results.append(self.find_prefix(target[:-1], refresh=False))
+            else:
+                name, channel_id = self.find(target, refresh=refresh)
+                results.append([(name, channel_id)] if channel_id else [])
+        return results
+
+
+__all__ = ["ChannelDirectory"]
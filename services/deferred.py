@@ -0,0 +1,178 @@
+# deferred.py
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from flask import request, jsonify, copy_current_request_context
+
+from services.metrics import registry, track_upstream, Histogram, Gauge
+from services.lazy import per_process
+from services.http import get_http_session, HTTP_TIMEOUT
+from services.signature import signing_secret, verify_slack_request
+from services import aio
+
+logger = logging.getLogger(__name__)
+
+# 지연 실행 작업자 수 / 대기열 최대 길이
+DEFERRED_MAX_WORKERS = int(os.environ.get("DEFERRED_MAX_WORKERS", "8"))
+DEFERRED_MAX_QUEUE = int(os.environ.get("DEFERRED_MAX_QUEUE", "64"))
+# "0"이면 지연 실행을 끄고 모든 명령을 요청 스레드에서 처리
+DEFERRED_ENABLED = os.environ.get("DEFERRED_ENABLED", "1") != "0"
+BUSY_TEXT = "⏳ 요청이 많아 처리하지 못했습니다. 잠시 후 다시 시도하세요."
+# 결과를 보낼 수 있는 response_url 주소 (벤치마크에서는 로컬 스텁 주소로 바꾼다)
+SLACK_RESPONSE_URL_BASE = os.environ.get("SLACK_RESPONSE_URL_BASE", "https://hooks.slack.com/")
+
+# 뷰가 이 값을 반환하면 작업자는 response_url로 보내지 않는다 (뷰가 나중에 send_response로 직접 보낸다)
+REPLY_LATER = object()
+
+deferred_latency = registry.register(Histogram(
+    "deferred_command_duration_seconds", "지연 실행 명령의 처리~response_url 전송 완료 시간", ("route",)))
+
+
+class DeferredExecutor:
+    """슬래시 명령을 작업자 풀에서 실행하고 결과를 response_url로 보낸다."""
+
+    def __init__(self, max_workers=DEFERRED_MAX_WORKERS, max_queue=DEFERRED_MAX_QUEUE):
+        self.max_workers = max_workers
+        # 실행 중 + 대기 중인 작업 수 제한
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="deferred")
+        self.in_flight = 0
+        self._count_lock = threading.Lock()
+
+    def submit(self, func, response_url, route="unknown"):
+        """작업을 등록한다. 대기열이 가득 차면 False."""
+        if not self._slots.acquire(blocking=False):
+            return False
+        with self._count_lock:
+            self.in_flight += 1
+        queued_at = time.perf_counter()
+
+        def run():
+            try:
+                try:
+                    rv = func()
+                    if rv is REPLY_LATER:
+                        return
+                    payload = _response_payload(rv)
+                except Exception as e:
+                    payload = {"response_type": "ephemeral", "text": f"⚠️ 오류 발생: {str(e)}"}
+                post_response(response_url, payload)
+            finally:
+                deferred_latency.observe(time.perf_counter() - queued_at, route)
+                with self._count_lock:
+                    self.in_flight -= 1
+                self._slots.release()
+
+        self._pool.submit(run)
+        return True
+
+
+def post_response(response_url, payload):
+    """response_url로 결과를 보낸다. 실패는 기록만 한다."""
+    try:
+        with track_upstream("slack", "response_url") as call:
+            call.status = get_http_session().post(response_url, json=payload, timeout=HTTP_TIMEOUT).status_code
+    except requests.RequestException as e:
+        logger.warning("response_url 전송 실패: %s", e)
+
+
+def send_response(response_url, payload, route="unknown"):
+    """다른 스레드(전송 완료 콜백 등)에서 결과를 보낼 때 사용. 작업자 풀에 넘기고, 가득 차면 바로 보낸다."""
+    if not get_executor().submit(lambda: payload, response_url, route):
+        post_response(response_url, payload)
+
+
+def is_deferred():
+    """현재 요청이 작업자 풀에서 처리되어 결과를 response_url로 보내는 경우 True."""
+    return DEFERRED_ENABLED and bool(request.form.get("response_url"))
+
+
+def _response_payload(rv):
+    """뷰 함수 반환값(Response, dict, (body, status))을 response_url용 dict로 변환."""
+    if isinstance(rv, tuple):
+        rv = rv[0]
+    if isinstance(rv, dict):
+        return rv
+    data = rv.get_json(silent=True) if hasattr(rv, "get_json") else None
+    if data is None:
+        text = rv.get_data(as_text=True) if hasattr(rv, "get_data") else str(rv)
+        data = {"text": text}
+    return data
+
+
+get_executor = per_process(DeferredExecutor)
+
+
+def _in_flight_count():
+    executor = get_executor.peek()
+    return executor.in_flight if executor else 0
+
+registry.register(Gauge("deferred_commands_in_flight", "실행 중이거나 대기 중인 지연 실행 명령 수", _in_flight_count))
+
+
+async def _run_async(async_view, form, response_url, route):
+    """비동기 실행 모드: 이벤트 루프에서 명령을 처리하고 공용 aiohttp 세션으로 response_url에 보낸다."""
+    runtime = aio.get_runtime()
+    started = time.perf_counter()
+    try:
+        try:
+            payload = await async_view(form)
+        except Exception as e:
+            payload = {"response_type": "ephemeral", "text": f"⚠️ 오류 발생: {str(e)}"}
+        with track_upstream("slack", "response_url") as call:
+            async with runtime.session.post(response_url, json=payload) as resp:
+                call.status = resp.status
+                await resp.read()
+    except Exception as e:
+        logger.warning("response_url 전송 실패: %s", e)
+    finally:
+        deferred_latency.observe(time.perf_counter() - started, route)
+
+
+def deferred(view=None, *, async_view=None):
+    """슬래시 명령 뷰를 즉시 200으로 응답하고 실제 처리는 작업자 풀에서 하도록 한다.
+
+    async_view(form dict → 응답 dict 코루틴)를 함께 주면 ASYNC_MODE=1일 때 스레드 대신
+    이벤트 루프에서 처리한다. aiohttp가 없거나 모드가 꺼져 있으면 기존 작업자 풀을 쓴다.
+    """
+    if view is None:
+        return functools.partial(deferred, async_view=async_view)
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        response_url = request.form.get("response_url")
+        if not DEFERRED_ENABLED or not response_url:
+            return view(*args, **kwargs)
+
+        # 서버가 요청에 적힌 주소로 POST하므로 Slack 주소인지, 서명이 맞는지 먼저 확인
+        if not response_url.startswith(SLACK_RESPONSE_URL_BASE):
+            return "invalid response_url", 400
+        if signing_secret() and not verify_slack_request():
+            return "invalid signature", 403
+
+        route = request.url_rule.rule if request.url_rule else request.path
+
+        if async_view is not None and aio.async_enabled():
+            coro = _run_async(async_view, request.form.to_dict(), response_url, route)
+            if aio.get_runtime().submit(coro) is None:
+                return jsonify(response_type="ephemeral", text=BUSY_TEXT)
+            return "", 200
+
+        @copy_current_request_context
+        def run():
+            return view(*args, **kwargs)
+
+        if not get_executor().submit(run, response_url, route):
+            return jsonify(response_type="ephemeral", text=BUSY_TEXT)
+        return "", 200
+
+    return wrapper
+
+__all__ = [
+    "DeferredExecutor", "deferred", "get_executor", "REPLY_LATER", "send_response", "post_response", "is_deferred",
+]
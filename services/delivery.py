@@ -0,0 +1,288 @@
+# delivery.py
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from urllib.error import URLError
+
+from slack_sdk.errors import SlackApiError
+
+from services.metrics import track_upstream, log_sampled
+
+logger = logging.getLogger(__name__)
+
+DELIVERY_MAX_WORKERS = int(os.environ.get("DELIVERY_MAX_WORKERS", "4"))
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+# 상태 조회용으로 보관하는 최근 전송 건수
+STATUS_HISTORY = 1000
+
+# 메서드별 Slack 요청 한도 등급. chat.postMessage는 채널당 초당 1건
+METHOD_TIERS = {
+    "chat.postMessage": "special",
+    "chat.postEphemeral": "tier4",
+    "chat.update": "tier3",
+    "conversations.list": "tier2",
+}
+# 등급별 (초당 토큰 보충량, 최대 버스트)
+TIER_LIMITS = {
+    "tier1": (1 / 60, 1),
+    "tier2": (20 / 60, 5),
+    "tier3": (50 / 60, 10),
+    "tier4": (100 / 60, 20),
+    "special": (1.0, 1),
+}
+# 재시도해도 소용없는 오류
+PERMANENT_ERRORS = {
+    "not_in_channel", "channel_not_found", "is_archived", "invalid_auth",
+    "not_authed", "account_inactive", "msg_too_long", "no_text", "restricted_action",
+}
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _fill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        """토큰 하나를 쓸 수 있을 때까지 남은 시간(초)."""
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._fill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._fill(now)
+        self.tokens -= 1
+
+    def pause(self, until):
+        """429 Retry-After 동안 이 버킷의 요청을 멈춘다."""
+        self.paused_until = max(self.paused_until, until)
+        self.tokens = 0.0
+
+
+class DeliveryQueueClosed(RuntimeError):
+    """닫혀서 작업자가 모두 끝난 대기열에 전송을 넣으려 할 때."""
+
+
+class Delivery:
+    """전송 한 건. future로 결과(SlackResponse) 또는 최종 오류를 전달한다."""
+
+    def __init__(self, delivery_id, method, channel, kwargs):
+        self.id = delivery_id
+        self.method = method
+        self.channel = channel
+        self.kwargs = kwargs
+        self.status = "queued"
+        self.attempts = 0
+        self.error = None
+        self.not_before = 0.0
+        self.future = Future()
+
+    def wait(self, timeout=None):
+        return self.future.result(timeout)
+
+    def as_dict(self):
+        return {
+            "id": self.id,
+            "method": self.method,
+            "channel": self.channel,
+            "status": self.status,
+            "attempts": self.attempts,
+            "error": self.error,
+        }
+
+
+class DeliveryQueue:
+    """Slack 전송 대기열. 등급별 토큰 버킷, Retry-After, 지수 백오프, 채널별 순서 보장.
+
+    log(DeliveryLog)를 주면 전송 번호를 거기서 받고 상태 변화를 기록한다. 없으면 프로세스 안 번호.
+    """
+
+    def __init__(self, client, max_workers=DELIVERY_MAX_WORKERS, log=None, team_id=""):
+        self.client = client
+        self.max_workers = max_workers
+        self.log = log
+        self.team_id = team_id
+        self._cond = threading.Condition()
+        self._channels = OrderedDict()   # 채널 → 대기 중인 Delivery deque (선두가 다음 전송 대상)
+        self._busy = set()               # 전송 중인 채널
+        self._buckets = {}
+        self._history = OrderedDict()    # 순번 → Delivery (상태별 개수 집계용)
+        self._ids = itertools.count(1)
+        self._alive = 0                  # 살아 있는 작업자 수
+        self._closing = False            # close() 이후: 남은 전송을 마저 보내고 작업자를 끝낸다
+
+    # ----- 등록 / 조회 -----
+    def submit(self, method, channel, requested_by=None, **kwargs):
+        """전송을 대기열에 넣는다. requested_by는 전송 상태를 조회할 수 있는 사용자."""
+        if self._closing and not self._alive:
+            raise DeliveryQueueClosed("전송 대기열이 닫혔습니다.")
+        delivery_id = self.log.add(self.team_id, requested_by, method, channel) if self.log else None
+        with self._cond:
+            if self._closing and not self._alive:
+                raise DeliveryQueueClosed("전송 대기열이 닫혔습니다.")
+            if not self._alive and not self._closing:
+                self._start_workers()
+            seq = next(self._ids)
+            delivery = Delivery(delivery_id if self.log else seq, method, channel, dict(kwargs, channel=channel))
+            self._channels.setdefault(channel, deque()).append(delivery)
+            self._history[seq] = delivery
+            while len(self._history) > STATUS_HISTORY:
+                self._history.popitem(last=False)
+            self._cond.notify()
+        return delivery
+
+    def post_message(self, channel, text, **kwargs):
+        return self.submit("chat.postMessage", channel, text=text, **kwargs)
+
+    @property
+    def idle(self):
+        """대기 중이거나 전송 중인 항목이 없으면 True."""
+        with self._cond:
+            return not self._channels
+
+    def stats(self):
+        with self._cond:
+            pending = sum(len(q) for q in self._channels.values())
+            counts = {}
+            for d in self._history.values():
+                counts[d.status] = counts.get(d.status, 0) + 1
+        return {"pending": pending, "channels": len(self._channels), "statuses": counts}
+
+    # ----- 작업자 -----
+    def _start_workers(self):
+        # 잠금을 잡은 상태에서 호출. 처음 전송할 때 작업자 스레드를 띄운다
+        self._alive = self.max_workers
+        for n in range(self.max_workers):
+            threading.Thread(target=self._work, name=f"delivery-{n}", daemon=True).start()
+
+    def close(self):
+        """대기열을 닫는다. 남은 전송은 마저 보내고 비면 작업자가 끝난다 (다시 띄우지 않는다).
+
+        닫을 때 대기 중인 전송이 없었으면 True. 작업자가 남아 있는 동안 들어온 전송도 보내고,
+        작업자가 모두 끝난 뒤의 submit은 DeliveryQueueClosed.
+        """
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+            return not self._channels
+
+    def _bucket(self, delivery):
+        tier = METHOD_TIERS.get(delivery.method, "tier3")
+        key = (tier, delivery.channel) if tier == "special" else tier
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(*TIER_LIMITS[tier])
+        return bucket
+
+    def _next_ready(self):
+        """전송 가능한 채널 선두 항목을 고른다. 없으면 (None, 기다릴 시간)."""
+        now = time.monotonic()
+        wait = None
+        for channel, queue in self._channels.items():
+            if channel in self._busy:
+                continue
+            delivery = queue[0]
+            bucket = self._bucket(delivery)
+            delay = max(delivery.not_before - now, bucket.wait_time(now))
+            if delay <= 0:
+                bucket.take(now)
+                self._busy.add(channel)
+                # 다른 채널에 차례가 돌아가도록 맨 뒤로 보낸다
+                self._channels.move_to_end(channel)
+                return delivery, None
+            wait = delay if wait is None else min(wait, delay)
+        return None, wait
+
+    def _work(self):
+        while True:
+            with self._cond:
+                delivery, wait = self._next_ready()
+                while delivery is None:
+                    if self._closing and not self._channels:
+                        self._alive -= 1
+                        return
+                    self._cond.wait(wait)
+                    delivery, wait = self._next_ready()
+                delivery.status = "sending"
+                delivery.attempts += 1
+
+            done, retry_at = self._send(delivery)
+
+            with self._cond:
+                self._busy.discard(delivery.channel)
+                if done:
+                    queue = self._channels[delivery.channel]
+                    queue.popleft()
+                    if not queue:
+                        del self._channels[delivery.channel]
+                else:
+                    delivery.status = "retrying"
+                    delivery.not_before = retry_at
+                self._cond.notify_all()
+            if not done:
+                self._record(delivery)
+
+    def _record(self, delivery):
+        if self.log is not None:
+            self.log.update(delivery)
+
+    def _send(self, delivery):
+        """한 번 전송을 시도한다. (완료 여부, 재시도 시각)을 반환."""
+        now = time.monotonic()
+        try:
+            with track_upstream("slack", delivery.method):
+                response = getattr(self.client, delivery.method.replace(".", "_"))(**delivery.kwargs)
+        except SlackApiError as e:
+            reason = e.response.get("error") if e.response is not None else None
+            delivery.error = reason or str(e)
+            if e.response is not None and e.response.status_code == 429:
+                retry_after = float(e.response.headers.get("Retry-After", 1))
+                with self._cond:
+                    self._bucket(delivery).pause(now + retry_after)
+                if delivery.attempts < MAX_ATTEMPTS * 2:
+                    return False, now + retry_after
+            elif reason not in PERMANENT_ERRORS and delivery.attempts < MAX_ATTEMPTS:
+                return False, now + self._backoff(delivery.attempts)
+            return self._fail(delivery, e)
+        except (URLError, OSError) as e:
+            delivery.error = str(e)
+            if delivery.attempts < MAX_ATTEMPTS:
+                return False, now + self._backoff(delivery.attempts)
+            return self._fail(delivery, e)
+        except Exception as e:
+            delivery.error = str(e)
+            return self._fail(delivery, e)
+
+        delivery.status = "sent"
+        delivery.error = None
+        self._record(delivery)
+        delivery.future.set_result(response)
+        return True, None
+
+    def _fail(self, delivery, error):
+        delivery.status = "failed"
+        log_sampled(logger, "delivery_failed", rate=1.0, **delivery.as_dict())
+        self._record(delivery)
+        delivery.future.set_exception(error)
+        return True, None
+
+    @staticmethod
+    def _backoff(attempt):
+        # full jitter 지수 백오프
+        return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+__all__ = ["DeliveryQueue", "Delivery", "DeliveryQueueClosed"]
@@ -0,0 +1,106 @@
+# delivery_log.py
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from services.lazy import per_process
+from services.notice_store import NOTICE_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+# 워커 프로세스들이 함께 쓰는 전송 기록 DB (기본: 예약 공지 DB에 테이블 추가)
+DELIVERY_LOG_DB = os.environ.get("DELIVERY_LOG_DB", NOTICE_DB_PATH)
+# 전송 기록 보관 기간(초)
+DELIVERY_LOG_RETENTION = float(os.environ.get("DELIVERY_LOG_RETENTION", str(7 * 24 * 3600)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS deliveries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    team_id TEXT NOT NULL,
+    user_id TEXT,
+    method TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_deliveries_created ON deliveries (created_at);
+"""
+
+
+class DeliveryLog:
+    """전송 상태 기록. 전송 번호는 이 테이블의 id라서 워커·워크스페이스가 달라도 겹치지 않는다."""
+
+    def __init__(self, path=DELIVERY_LOG_DB, retention=DELIVERY_LOG_RETENTION):
+        self.path = path
+        self.retention = retention
+        self._purged_at = 0.0
+        self._purge_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def _purge(self, conn, now):
+        # 보관 기간이 지난 기록은 한 시간에 한 번 지운다
+        with self._purge_lock:
+            if now - self._purged_at < 3600:
+                return
+            self._purged_at = now
+        conn.execute("DELETE FROM deliveries WHERE created_at <= ?", (now - self.retention,))
+
+    def add(self, team_id, user_id, method, channel):
+        """새 전송 번호. 기록하지 못하면 None (전송은 그대로 진행한다)."""
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                self._purge(conn, now)
+                return conn.execute(
+                    "INSERT INTO deliveries (team_id, user_id, method, channel, status, created_at, updated_at)"
+                    " VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                    (team_id, user_id, method, channel, now, now),
+                ).lastrowid
+        except sqlite3.Error as e:
+            logger.warning("전송 기록 추가 실패: %s", e)
+            return None
+
+    def update(self, delivery):
+        if delivery.id is None:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE deliveries SET status = ?, attempts = ?, error = ?, updated_at = ? WHERE id = ?",
+                    (delivery.status, delivery.attempts, delivery.error, time.time(), delivery.id),
+                )
+        except sqlite3.Error as e:
+            logger.warning("전송 기록 갱신 실패: %s", e)
+
+    def get(self, delivery_id, team_id, user_id):
+        """team_id 워크스페이스에서 user_id가 요청한 전송만 반환. 없으면 None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, method, channel, status, attempts, error FROM deliveries"
+                " WHERE id = ? AND team_id = ? AND user_id = ?",
+                (delivery_id, team_id, user_id),
+            ).fetchone()
+        return dict(row) if row else None
+
+
+get_delivery_log = per_process(DeliveryLog)
+
+__all__ = ["DeliveryLog", "get_delivery_log", "DELIVERY_LOG_DB"]
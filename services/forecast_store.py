@@ -0,0 +1,93 @@
+# forecast_store.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from services.lazy import per_process
+from services.notice_store import NOTICE_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+# 워커 프로세스들이 함께 쓰는 예보 응답 캐시 DB (기본: 예약 공지 DB에 테이블 추가)
+FORECAST_CACHE_DB = os.environ.get("FORECAST_CACHE_DB", NOTICE_DB_PATH)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS forecasts (
+    base_date TEXT NOT NULL,
+    base_time TEXT NOT NULL,
+    nx INTEGER NOT NULL,
+    ny INTEGER NOT NULL,
+    body TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (base_date, base_time, nx, ny)
+);
+CREATE INDEX IF NOT EXISTS idx_forecasts_expires ON forecasts (expires_at);
+"""
+
+
+class ForecastStore:
+    """발표시각·격자별 기상청 응답. 한 워커가 받아 온 예보(선조회 포함)를 다른 워커도 그대로 쓴다.
+
+    DB를 읽거나 쓰지 못하면 캐시가 없는 것처럼 동작한다 (예보는 기상청에서 직접 받는다).
+    """
+
+    def __init__(self, path=FORECAST_CACHE_DB):
+        self.path = path
+        self._purged_at = 0.0
+        self._purge_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def get(self, base_date, base_time, nx, ny):
+        """저장된 응답 JSON. 없거나 만료되었으면 None."""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT body FROM forecasts"
+                    " WHERE base_date = ? AND base_time = ? AND nx = ? AND ny = ? AND expires_at > ?",
+                    (base_date, base_time, nx, ny, time.time()),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("예보 캐시 읽기 실패: %s", e)
+            return None
+        return json.loads(row[0]) if row else None
+
+    def put(self, base_date, base_time, nx, ny, data, expires_at):
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                self._purge(conn, now)
+                conn.execute(
+                    "INSERT OR REPLACE INTO forecasts (base_date, base_time, nx, ny, body, expires_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (base_date, base_time, nx, ny, json.dumps(data, ensure_ascii=False), expires_at),
+                )
+        except sqlite3.Error as e:
+            logger.warning("예보 캐시 저장 실패: %s", e)
+
+    def _purge(self, conn, now):
+        # 만료된 예보는 한 시간에 한 번 지운다
+        with self._purge_lock:
+            if now - self._purged_at < 3600:
+                return
+            self._purged_at = now
+        conn.execute("DELETE FROM forecasts WHERE expires_at <= ?", (now,))
+
+
+get_forecast_store = per_process(ForecastStore)
+
+__all__ = ["ForecastStore", "get_forecast_store", "FORECAST_CACHE_DB"]
@@ -0,0 +1,27 @@
+# http.py
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.lazy import per_process
+
+# 외부 HTTP 호출 (연결, 읽기) 제한 시간(초)
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", "10"))
+HTTP_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+# 호스트별로 유지할 keep-alive 연결 수
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "32"))
+
+
+def _create_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+# 기상청 API, response_url 전송에 쓰는 공용 세션 (프로세스별 연결 풀)
+get_http_session = per_process(_create_session)
+
+__all__ = ["get_http_session", "HTTP_TIMEOUT", "HTTP_CONNECT_TIMEOUT", "HTTP_READ_TIMEOUT", "HTTP_POOL_SIZE"]
@@ -0,0 +1,190 @@
+# idempotency.py
+import functools
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, current_app, request
+
+from services.lazy import per_process
+from services.metrics import registry, Counter
+from services.notice_store import NOTICE_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+# 같은 요청을 중복으로 보는 시간(초)
+IDEMPOTENCY_TTL = float(os.environ.get("IDEMPOTENCY_TTL", "300"))
+# 원래 요청이 아직 처리 중일 때 중복 요청이 결과를 기다리는 최대 시간(초). Slack 3초 제한보다 짧게
+IDEMPOTENCY_WAIT = float(os.environ.get("IDEMPOTENCY_WAIT", "2.0"))
+# 워커 프로세스들이 함께 쓰는 응답 기록 DB (기본: 예약 공지 DB에 테이블 추가)
+IDEMPOTENCY_DB = os.environ.get("IDEMPOTENCY_DB", NOTICE_DB_PATH)
+# 처리 중인 원래 요청의 결과를 다시 확인하는 간격(초)
+POLL_INTERVAL = 0.05
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS request_responses (
+    key TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL,
+    status INTEGER,
+    body BLOB,
+    headers TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_request_responses_expires ON request_responses (expires_at);
+"""
+
+# 재생할 때 되돌려 줄 응답 헤더
+REPLAY_HEADERS = ("Content-Type",)
+
+duplicate_requests = registry.register(Counter(
+    "duplicate_requests_total", "중복(재시도) 요청 수. replayed=저장된 응답 반환, in_progress=처리 중이라 빈 응답", ("route", "outcome")))
+
+
+def request_key():
+    """Slack 재시도를 알아볼 키: 경로 + trigger_id(슬래시 명령) 또는 event_id(Events API) + 본문 해시.
+
+    식별자도 재시도 헤더(X-Slack-Retry-Num)도 없으면 None (중복 검사 안 함).
+    """
+    if request.form:
+        ident = request.form.get("trigger_id")
+        body = repr(sorted(request.form.items(multi=True))).encode()
+    else:
+        body = request.get_data()
+        data = request.get_json(silent=True)
+        ident = data.get("event_id") if isinstance(data, dict) else None
+    if not ident and not request.headers.get("X-Slack-Retry-Num"):
+        return None
+    route = request.url_rule.rule if request.url_rule else request.path
+    return f"{route}:{ident or ''}:{hashlib.sha256(body).hexdigest()}"
+
+
+class ResponseCache:
+    """요청 키 → 첫 응답. 여러 워커가 함께 보도록 SQLite에 두고, 키는 INSERT OR IGNORE로 선점한다."""
+
+    def __init__(self, path=IDEMPOTENCY_DB, ttl=IDEMPOTENCY_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._purged_at = 0.0
+        self._purge_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            # 재시도 판별용 기록이라 전원이 꺼질 때 마지막 몇 건을 잃어도 된다
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def _purge(self, conn, now):
+        # 만료된 기록은 TTL 주기로 한꺼번에 지운다
+        with self._purge_lock:
+            if now - self._purged_at < self.ttl:
+                return
+            self._purged_at = now
+        conn.execute("DELETE FROM request_responses WHERE expires_at <= ?", (now,))
+
+    def begin(self, key):
+        """처음 보는 요청이면 키를 선점하고 True. 이미 다른 요청(다른 워커 포함)이 선점했으면 False."""
+        now = time.time()
+        with self._connect() as conn:
+            self._purge(conn, now)
+            conn.execute("DELETE FROM request_responses WHERE key = ? AND expires_at <= ?", (key, now))
+            return conn.execute(
+                "INSERT OR IGNORE INTO request_responses (key, expires_at) VALUES (?, ?)", (key, now + self.ttl)
+            ).rowcount == 1
+
+    def wait(self, key, timeout):
+        """원래 요청의 결과를 기다린다. (본문, 상태, 헤더), 아직 처리 중이면 False, 실패했으면 None."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT status, body, headers FROM request_responses WHERE key = ?", (key,)
+                ).fetchone()
+            if row is None:
+                return None
+            if row[0] is not None:
+                return row[1], row[0], json.loads(row[2])
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(POLL_INTERVAL)
+
+    def finish(self, key, response):
+        """처리 결과를 기록. response가 None(실패)이면 키를 지워 다음 재시도가 다시 처리되게 한다."""
+        with self._connect() as conn:
+            if response is None:
+                conn.execute("DELETE FROM request_responses WHERE key = ?", (key,))
+            else:
+                body, status, headers = response
+                conn.execute(
+                    "UPDATE request_responses SET status = ?, body = ?, headers = ? WHERE key = ?",
+                    (status, body, json.dumps(headers), key),
+                )
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM request_responses WHERE expires_at > ?", (time.time(),)).fetchone()[0]
+
+
+get_response_cache = per_process(ResponseCache)
+
+
+def idempotent(view):
+    """Slack 재시도 등 같은 요청이 다시 오면 뷰를 실행하지 않고 첫 응답을 돌려준다.
+
+    @deferred보다 바깥에 두면 재시도가 작업자 풀에 다시 들어가지 않는다. 5xx 응답이나 예외는
+    저장하지 않으므로 그 뒤의 재시도는 정상적으로 다시 처리된다. 재시도가 다른 워커로 가도
+    SQLite에 기록된 응답을 보므로 같은 결과가 된다. DB 오류 시에는 중복 검사 없이 처리한다.
+    """
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request_key()
+        if key is None:
+            return view(*args, **kwargs)
+
+        cache = get_response_cache()
+        try:
+            first = cache.begin(key)
+            if not first:
+                route = request.url_rule.rule if request.url_rule else request.path
+                stored = cache.wait(key, IDEMPOTENCY_WAIT)
+                if stored is False:
+                    # 원래 요청이 아직 처리 중: 결과는 원래 요청이 보낸다
+                    duplicate_requests.inc(route, "in_progress")
+                    return "", 200
+                if stored is not None:
+                    duplicate_requests.inc(route, "replayed")
+                    body, status, headers = stored
+                    return Response(body, status, headers)
+                # 원래 요청이 실패했으면 이번 요청을 새로 처리
+                return view(*args, **kwargs)
+        except sqlite3.Error as e:
+            logger.warning("중복 요청 기록 조회 실패: %s", e)
+            return view(*args, **kwargs)
+
+        response = None
+        try:
+            rv = current_app.make_response(view(*args, **kwargs))
+            if rv.status_code < 500:
+                headers = [(k, v) for k, v in rv.headers if k in REPLAY_HEADERS]
+                response = (rv.get_data(), rv.status_code, headers)
+            return rv
+        finally:
+            try:
+                cache.finish(key, response)
+            except sqlite3.Error as e:
+                logger.warning("중복 요청 기록 저장 실패: %s", e)
+
+    return wrapper
+
+__all__ = ["idempotent", "ResponseCache", "request_key", "get_response_cache"]
@@ -0,0 +1,56 @@
+# kma_grid.py
+import json
+import math
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PLACES_PATH = os.path.join(BASE_DIR, "..", "data", "weather_places.json")
+
+# 기상청 동네예보 격자 (Lambert Conformal Conic) 상수
+RE = 6371.00877     # 지구 반경(km)
+GRID = 5.0          # 격자 간격(km)
+SLAT1 = 30.0        # 투영 위도1
+SLAT2 = 60.0        # 투영 위도2
+OLON = 126.0        # 기준점 경도
+OLAT = 38.0         # 기준점 위도
+XO = 43             # 기준점 X좌표(격자)
+YO = 136            # 기준점 Y좌표(격자)
+
+# 투영 계수는 한 번만 계산
+_DEGRAD = math.pi / 180.0
+_re = RE / GRID
+_slat1, _slat2 = SLAT1 * _DEGRAD, SLAT2 * _DEGRAD
+_olon, _olat = OLON * _DEGRAD, OLAT * _DEGRAD
+_sn = math.log(math.cos(_slat1) / math.cos(_slat2)) / math.log(
+    math.tan(math.pi * 0.25 + _slat2 * 0.5) / math.tan(math.pi * 0.25 + _slat1 * 0.5)
+)
+_sf = math.pow(math.tan(math.pi * 0.25 + _slat1 * 0.5), _sn) * math.cos(_slat1) / _sn
+_ro = _re * _sf / math.pow(math.tan(math.pi * 0.25 + _olat * 0.5), _sn)
+
+
+def latlon_to_grid(lat, lon):
+    """위경도를 기상청 격자 (nx, ny)로 변환."""
+    ra = _re * _sf / math.pow(math.tan(math.pi * 0.25 + lat * _DEGRAD * 0.5), _sn)
+    theta = lon * _DEGRAD - _olon
+    if theta > math.pi:
+        theta -= 2.0 * math.pi
+    if theta < -math.pi:
+        theta += 2.0 * math.pi
+    theta *= _sn
+    nx = math.floor(ra * math.sin(theta) + XO + 0.5)
+    ny = math.floor(_ro - ra * math.cos(theta) + YO + 0.5)
+    return nx, ny
+
+
+def load_places(path=PLACES_PATH):
+    """지명 사전을 읽어 {지명: {"nx", "ny"}}와 {묶음명: [지명, ...]}을 반환. 격자는 적재 시 한 번만 계산."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    places = {}
+    for place in data["places"]:
+        nx, ny = latlon_to_grid(place["lat"], place["lon"])
+        for name in [place["name"], *place.get("aliases", [])]:
+            places[name] = {"nx": nx, "ny": ny}
+    return places, data.get("groups", {})
+
+__all__ = ["latlon_to_grid", "load_places"]
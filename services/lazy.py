@@ -0,0 +1,37 @@
+# lazy.py
+import os
+import threading
+
+
+def per_process(factory):
+    """처음 호출될 때 factory()로 객체를 만들어 프로세스별로 재사용하는 getter를 반환.
+
+    gunicorn 등에서 fork된 워커는 부모가 만든 클라이언트/스레드/잠금을 물려받지 않고
+    자기 프로세스에서 새로 만든다.
+    """
+    state = {"pid": None, "instance": None, "lock": threading.Lock()}
+
+    def _after_fork():
+        # fork 시점에 다른 스레드가 잡고 있던 잠금을 물려받지 않도록 새로 만든다
+        state.update(pid=None, instance=None, lock=threading.Lock())
+
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_after_fork)
+
+    def get():
+        if state["pid"] == os.getpid():
+            return state["instance"]
+        with state["lock"]:
+            if state["pid"] != os.getpid():
+                state["instance"] = factory()
+                state["pid"] = os.getpid()
+        return state["instance"]
+
+    def peek():
+        """이미 만들어졌으면 반환, 아니면 None."""
+        return state["instance"] if state["pid"] == os.getpid() else None
+
+    get.peek = peek
+    return get
+
+__all__ = ["per_process"]
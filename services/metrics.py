@@ -0,0 +1,360 @@
+# metrics.py
+import atexit
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from flask import Response, g, request
+
+from services.lazy import per_process
+
+# 구조화 로그 표본 비율 (0~1). 대량 발생하는 디버그 로그에만 사용
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "0.01"))
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# 설정하면 워커 프로세스마다 지표를 이 디렉터리에 기록하고 /metrics는 모든 워커를 합산해 보여 준다.
+# 배포를 시작할 때 비워 둔다. 설정하지 않으면 워커별 값에 pid 라벨을 붙인다
+METRICS_DIR = os.environ.get("METRICS_DIR", "")
+# 워커별 지표 파일을 다시 쓰는 주기(초)
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", "5"))
+
+
+def _format_labels(names, values, *extra):
+    pairs = list(zip(names, values))
+    pairs.extend(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name, self.help, self.labels = name, help_text, tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *label_values, amount=1):
+        _ensure_flusher()
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(values), count] for values, count in self._values.items()]
+
+    @staticmethod
+    def merge(snapshots):
+        merged = {}
+        for snapshot in snapshots:
+            for values, count in snapshot:
+                merged[tuple(values)] = merged.get(tuple(values), 0) + count
+        return merged
+
+    def render(self, values=None, extra=()):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        if values is None:
+            values = dict((tuple(v), c) for v, c in self.snapshot())
+        for label_values, count in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values, *extra)} {count}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labels = name, help_text, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._values = {}   # 라벨 값 → [버킷별 개수..., 합계, 전체 개수]
+
+    def observe(self, value, *label_values):
+        _ensure_flusher()
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for n, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[n] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(values), list(state)] for values, state in self._values.items()]
+
+    @staticmethod
+    def merge(snapshots):
+        merged = {}
+        for snapshot in snapshots:
+            for values, state in snapshot:
+                total = merged.get(tuple(values))
+                merged[tuple(values)] = state if total is None else [a + b for a, b in zip(total, state)]
+        return merged
+
+    def render(self, values=None, extra=()):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        if values is None:
+            values = dict((tuple(v), s) for v, s in self.snapshot())
+        for label_values, state in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, label_values, *extra, ('le', bound))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, label_values, *extra, ('le', '+Inf'))} {state[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, label_values, *extra)} {state[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, label_values, *extra)} {state[-1]}")
+        return lines
+
+
+class Gauge:
+    """렌더링 시점에 함수를 호출해 값을 읽는 게이지. 여러 워커를 합산할 때는 살아 있는 워커 값의 합."""
+
+    def __init__(self, name, help_text, func):
+        self.name, self.help, self.func = name, help_text, func
+
+    def snapshot(self):
+        try:
+            return self.func()
+        except Exception:
+            return None
+
+    @staticmethod
+    def merge(snapshots):
+        values = [v for v in snapshots if v is not None]
+        return sum(values) if values else None
+
+    def render(self, values=None, extra=()):
+        value = self.snapshot() if values is None else values
+        if value is None:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge",
+                f"{self.name}{_format_labels((), (), *extra)} {value}"]
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Registry:
+    def __init__(self, directory=METRICS_DIR):
+        self.directory = directory
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def _reset_after_fork(self):
+        # fork된 워커는 부모의 값을 물려받지 않는다 (부모 값은 부모 파일에 따로 있다)
+        for metric in self._metrics:
+            if hasattr(metric, "_values"):
+                metric._lock = threading.Lock()
+                metric._values = {}
+
+    def flush(self):
+        """이 프로세스의 지표를 METRICS_DIR/<pid>.json 에 기록."""
+        if not self.directory:
+            return
+        data = {metric.name: metric.snapshot() for metric in self._metrics}
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+
+    def _load_all(self):
+        """(pid, 지표 dict) 목록. 끝난 워커 파일도 읽는다 (누적 카운터가 줄어들지 않도록)."""
+        found = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+                    found.append((int(filename[:-5]), json.load(f)))
+            except (OSError, ValueError):
+                continue
+        return found
+
+    def render(self):
+        lines = []
+        if not self.directory:
+            # 워커별 값: 스크레이프마다 다른 워커가 답해도 시계열이 섞이지 않도록 pid 라벨을 붙인다
+            pid = ("pid", os.getpid())
+            for metric in self._metrics:
+                lines.extend(metric.render(extra=(pid,)))
+            return "\n".join(lines) + "\n"
+
+        self.flush()
+        workers = self._load_all()
+        for metric in self._metrics:
+            if isinstance(metric, Gauge):
+                snapshots = [data.get(metric.name) for pid, data in workers if _alive(pid)]
+            else:
+                snapshots = [data.get(metric.name) or [] for _, data in workers]
+            lines.extend(metric.render(metric.merge(snapshots)))
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=registry._reset_after_fork)
+
+
+def _flush_loop():
+    while True:
+        time.sleep(METRICS_FLUSH_INTERVAL)
+        try:
+            registry.flush()
+        except OSError as e:
+            logging.getLogger(__name__).warning("지표 파일 기록 실패: %s", e)
+
+
+def _start_flusher():
+    os.makedirs(registry.directory, exist_ok=True)
+    threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True).start()
+    # 워커가 끝날 때 마지막 값을 남긴다
+    atexit.register(registry.flush)
+    return True
+
+
+# 워커 프로세스마다 한 번, 지표를 처음 기록할 때 주기 기록 스레드를 띄운다
+_flusher = per_process(_start_flusher)
+
+
+def _ensure_flusher():
+    if registry.directory:
+        _flusher()
+
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "슬래시 명령 요청 수", ("route", "status")))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "슬래시 명령 처리 시간", ("route",)))
+upstream_requests = registry.register(Counter(
+    "upstream_requests_total", "외부 API 호출 수. status=HTTP 상태 또는 Slack 오류 코드", ("service", "method", "outcome", "status")))
+upstream_latency = registry.register(Histogram(
+    "upstream_request_duration_seconds", "외부 API 호출 시간", ("service", "method")))
+job_runs = registry.register(Counter(
+    "scheduler_job_runs_total", "스케줄러 작업 실행 수", ("job", "outcome")))
+job_lag = registry.register(Histogram(
+    "scheduler_job_lag_seconds", "예정 시각 대비 스케줄러 작업 시작 지연", ("job",)))
+
+
+class UpstreamCall:
+    """track_upstream 블록 안에서 응답 상태를 적어 두는 곳."""
+
+    __slots__ = ("status",)
+
+    def __init__(self):
+        self.status = None
+
+
+def _error_status(error):
+    """예외에서 HTTP 상태(429, 5xx 등) 또는 Slack 오류 코드를 꺼낸다. 없으면 예외 이름."""
+    response = getattr(error, "response", None)
+    code = getattr(response, "status_code", None) or getattr(response, "status", None)
+    if isinstance(code, int) and (code == 429 or code >= 500):
+        return str(code)
+    try:
+        reason = response.get("error") if response is not None else None
+    except Exception:
+        reason = None
+    if isinstance(reason, str) and reason:
+        return reason
+    return str(code) if isinstance(code, int) else error.__class__.__name__
+
+
+@contextmanager
+def track_upstream(service, method):
+    """외부 호출 시간을 재고 결과를 센다.
+
+    블록 안에서 call.status에 HTTP 상태를 넣을 수 있다. 넣지 않으면 성공은 200, 예외는
+    _error_status(429·5xx, Slack 오류 코드, 예외 이름)로 센다. 4xx·5xx 상태는 실패로 센다.
+    """
+    start = time.perf_counter()
+    call = UpstreamCall()
+    outcome = "error"
+    try:
+        yield call
+        outcome = "error" if isinstance(call.status, int) and call.status >= 400 else "ok"
+    except Exception as e:
+        if call.status is None:
+            call.status = _error_status(e)
+        raise
+    finally:
+        upstream_latency.observe(time.perf_counter() - start, service, method)
+        upstream_requests.inc(service, method, outcome, str(200 if call.status is None else call.status))
+
+
+def observe_job_lag(job_id, scheduled_time, outcome="ok"):
+    lag = (datetime.now(timezone.utc) - scheduled_time).total_seconds()
+    job_lag.observe(max(lag, 0.0), job_id)
+    job_runs.inc(job_id, outcome)
+
+
+def _on_job_submitted(event):
+    # 실행기에 넘겨진 시각 기준 지연. 작업 실행 시간은 포함하지 않는다
+    for scheduled_time in event.scheduled_run_times:
+        job_lag.observe(max((datetime.now(timezone.utc) - scheduled_time).total_seconds(), 0.0), event.job_id)
+
+
+def _on_job_event(event):
+    from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_MISSED
+
+    outcome = {EVENT_JOB_ERROR: "error", EVENT_JOB_MISSED: "missed"}.get(event.code, "ok")
+    job_runs.inc(event.job_id, outcome)
+
+
+def instrument_scheduler(scheduler):
+    from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED
+
+    scheduler.add_listener(_on_job_submitted, EVENT_JOB_SUBMITTED)
+    scheduler.add_listener(_on_job_event, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED)
+
+
+def log_sampled(logger, event, rate=None, **fields):
+    """rate 비율로만 남기는 JSON 한 줄 로그."""
+    if random.random() >= (LOG_SAMPLE_RATE if rate is None else rate):
+        return
+    logger.info(json.dumps({"event": event, **fields}, ensure_ascii=False, default=str))
+
+
+def init_app(app):
+    """요청별 지연시간 기록과 /metrics 엔드포인트를 등록."""
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record(response):
+        start = g.pop("_metrics_start", None)
+        if start is not None and request.endpoint != "metrics":
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            http_latency.observe(time.perf_counter() - start, route)
+            http_requests.inc(route, str(response.status_code))
+        return response
+
+    @app.route("/metrics", endpoint="metrics")
+    def metrics():
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+    if not logging.getLogger().handlers:
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+        logging.getLogger("apscheduler").setLevel(logging.WARNING)
+
+__all__ = [
+    "registry", "Counter", "Histogram", "Gauge", "track_upstream", "observe_job_lag",
+    "instrument_scheduler", "log_sampled", "init_app",
+]
@@ -0,0 +1,171 @@
+# notice_store.py
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from services.lazy import per_process
+
+try:
+    import fcntl
+except ImportError:  # Windows 등 fcntl이 없는 환경에서는 단일 프로세스로 가정
+    fcntl = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+NOTICE_DB_PATH = os.environ.get("NOTICE_DB_PATH", os.path.join(BASE_DIR, "..", "notices.sqlite3"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notices (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    team_id TEXT,
+    channel_id TEXT NOT NULL,
+    channel_name TEXT,
+    message TEXT NOT NULL,
+    run_at REAL NOT NULL,
+    created_by TEXT,
+    created_at REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    sent_at REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_notices_due ON notices (status, run_at);
+"""
+
+
+def ceil_to_minute(timestamp):
+    """분 단위로 올림. 예약 시각보다 일찍 보내지 않도록 한다."""
+    return int(-(-timestamp // 60) * 60)
+
+
+class NoticeStore:
+    """예약 공지를 로컬 SQLite에 저장한다. 상태: pending → sending → sent/failed, 또는 cancelled."""
+
+    def __init__(self, path=NOTICE_DB_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # 여러 워크스페이스 지원 이전에 만든 DB에 team_id 열 추가
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(notices)")}
+            if "team_id" not in columns:
+                conn.execute("ALTER TABLE notices ADD COLUMN team_id TEXT")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def add(self, channel_id, channel_name, message, run_at, created_by=None, team_id=None):
+        """공지를 등록하고 ID를 반환. run_at은 분 단위로 올림해 같은 분의 공지를 함께 보낸다."""
+        run_at = ceil_to_minute(run_at)
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO notices (team_id, channel_id, channel_name, message, run_at, created_by, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (team_id, channel_id, channel_name, message, run_at, created_by, time.time()),
+            )
+            return cur.lastrowid
+
+    def pending(self, limit=20, team_id=None, include_legacy=False):
+        """대기 중인 공지. team_id를 주면 그 워크스페이스 것만 (include_legacy면 team_id 없이 저장된 이전 공지도)."""
+        with self._connect() as conn:
+            if team_id is None:
+                return conn.execute(
+                    "SELECT * FROM notices WHERE status = 'pending' ORDER BY run_at, id LIMIT ?", (limit,)
+                ).fetchall()
+            return conn.execute(
+                "SELECT * FROM notices WHERE status = 'pending' AND (team_id = ? OR (? AND team_id IS NULL))"
+                " ORDER BY run_at, id LIMIT ?",
+                (team_id, include_legacy, limit),
+            ).fetchall()
+
+    def cancel(self, notice_id, team_id=None, include_legacy=False):
+        """대기 중인 공지를 취소. 취소했으면 True. team_id를 주면 그 워크스페이스 공지만 취소한다.
+
+        team_id 없이 저장된 이전 공지는 기본 워크스페이스 것이므로 include_legacy일 때만 취소한다.
+        """
+        with self._connect() as conn:
+            if team_id is None:
+                cur = conn.execute(
+                    "UPDATE notices SET status = 'cancelled' WHERE id = ? AND status = 'pending'", (notice_id,)
+                )
+            else:
+                cur = conn.execute(
+                    "UPDATE notices SET status = 'cancelled' WHERE id = ? AND status = 'pending'"
+                    " AND (team_id = ? OR (? AND team_id IS NULL))",
+                    (notice_id, team_id, include_legacy),
+                )
+            return cur.rowcount > 0
+
+    def claim_due(self, now=None):
+        """전송 시각이 지난 공지를 한 번에 가져와 sending 상태로 바꾼다."""
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT * FROM notices WHERE status = 'pending' AND run_at <= ? ORDER BY run_at, id", (now,)
+                ).fetchall()
+                conn.executemany("UPDATE notices SET status = 'sending' WHERE id = ?", [(r["id"],) for r in rows])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return rows
+
+    def requeue_interrupted(self):
+        """이전 리더가 전송 도중 종료된 공지를 다시 대기 상태로 돌린다."""
+        with self._connect() as conn:
+            conn.execute("UPDATE notices SET status = 'pending' WHERE status = 'sending'")
+
+    def mark_sent(self, notice_id):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE notices SET status = 'sent', sent_at = ? WHERE id = ?", (time.time(), notice_id)
+            )
+
+    def mark_failed(self, notice_id, error):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE notices SET status = 'failed', error = ? WHERE id = ?", (str(error), notice_id)
+            )
+
+
+class LeaderLock:
+    """여러 워커 중 하나만 예약 공지를 보내도록 잠금 파일로 리더를 정한다."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """리더이면 True. 이미 리더라면 잠금을 계속 유지한다."""
+        with self._lock:
+            if self._file is not None:
+                return True
+            f = open(self.path, "a")
+            if fcntl is not None:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    f.close()
+                    return False
+            self._file = f
+            return True
+
+    @property
+    def is_leader(self):
+        return self._file is not None
+
+
+# 워커 프로세스마다 처음 사용할 때 연다 (잠금 파일 핸들을 fork로 공유하지 않도록).
+# 예약 공지 전송과 예보 선조회처럼 한 워커만 할 일은 이 잠금을 가진 워커가 맡는다
+get_leader_lock = per_process(lambda: LeaderLock(NOTICE_DB_PATH + ".lock"))
+
+__all__ = ["NoticeStore", "LeaderLock", "NOTICE_DB_PATH", "ceil_to_minute", "get_leader_lock"]
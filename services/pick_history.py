@@ -0,0 +1,130 @@
+# pick_history.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# 채널·명령별로 기억할 최근 추천 개수
+MENU_HISTORY_DEPTH = int(os.environ.get("MENU_HISTORY_DEPTH", "3"))
+# 메모리에 유지할 (명령, 채널) 수. 넘으면 가장 오래 쓰지 않은 채널부터 잊는다
+MENU_HISTORY_CHANNELS = int(os.environ.get("MENU_HISTORY_CHANNELS", "1000"))
+# 설정하면 최근 추천 기록을 로컬 SQLite에 저장해 재시작 후에도, 워커 프로세스 사이에서도 공유
+MENU_HISTORY_DB = os.environ.get("MENU_HISTORY_DB", "")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS menu_history (
+    command TEXT NOT NULL,
+    channel_id TEXT NOT NULL,
+    picks TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (command, channel_id)
+);
+"""
+
+
+class PickHistory:
+    """(명령, 채널)별 최근 추천 항목 이름. 메모리는 LRU로 제한한다.
+
+    path가 있으면 SQLite가 기준이다. 다른 워커의 기록도 보이도록 매번 읽고, 기록은 한 트랜잭션에서
+    읽고-고쳐-쓴다. 메모리 항목은 SQLite를 읽지 못할 때의 대체값으로만 쓴다.
+    """
+
+    def __init__(self, depth=MENU_HISTORY_DEPTH, capacity=MENU_HISTORY_CHANNELS, path=MENU_HISTORY_DB):
+        self.depth = depth
+        self.capacity = capacity
+        self.path = path
+        self._lock = threading.Lock()
+        self._recent = OrderedDict()  # (명령, 채널) → deque(최근 이름)
+        if self.path:
+            with self._connect() as conn:
+                conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _select(conn, command, channel_id):
+        row = conn.execute(
+            "SELECT picks FROM menu_history WHERE command = ? AND channel_id = ?", (command, channel_id)
+        ).fetchone()
+        return json.loads(row[0]) if row else ()
+
+    def _entry(self, key):
+        """잠금을 잡은 상태에서 호출. 메모리의 최근 기록 (없으면 빈 항목을 만든다)."""
+        entry = self._recent.get(key)
+        if entry is None:
+            entry = self._recent[key] = deque(maxlen=self.depth)
+            while len(self._recent) > self.capacity:
+                self._recent.popitem(last=False)
+        else:
+            self._recent.move_to_end(key)
+        return entry
+
+    def _remember(self, key, picks):
+        with self._lock:
+            entry = self._entry(key)
+            entry.clear()
+            entry.extend(picks)
+
+    def recent(self, command, channel_id):
+        """최근 추천한 이름 집합."""
+        if self.depth <= 0:
+            return frozenset()
+        key = (command, channel_id)
+        if self.path:
+            try:
+                with self._connect() as conn:
+                    picks = self._select(conn, command, channel_id)
+                self._remember(key, picks)
+                return frozenset(picks)
+            except sqlite3.Error as e:
+                logger.warning("추천 기록 읽기 실패: %s", e)
+        with self._lock:
+            return frozenset(self._entry(key))
+
+    def record(self, command, channel_id, name):
+        if self.depth <= 0:
+            return
+        key = (command, channel_id)
+        if self.path:
+            try:
+                with self._connect() as conn:
+                    # 다른 워커가 같은 채널에 동시에 기록해도 서로 덮어쓰지 않도록 읽기부터 잠근다
+                    conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        picks = deque(self._select(conn, command, channel_id), maxlen=self.depth)
+                        picks.append(name)
+                        conn.execute(
+                            "INSERT INTO menu_history (command, channel_id, picks, updated_at) VALUES (?, ?, ?, ?)"
+                            " ON CONFLICT (command, channel_id) DO UPDATE SET picks = excluded.picks,"
+                            " updated_at = excluded.updated_at",
+                            (command, channel_id, json.dumps(list(picks), ensure_ascii=False), time.time()),
+                        )
+                        conn.execute("COMMIT")
+                    except Exception:
+                        conn.execute("ROLLBACK")
+                        raise
+                self._remember(key, picks)
+                return
+            except sqlite3.Error as e:
+                # 기록 저장 실패는 추천 자체를 막지 않는다
+                logger.warning("추천 기록 저장 실패: %s", e)
+        with self._lock:
+            self._entry(key).append(name)
+
+    def __len__(self):
+        return len(self._recent)
+
+__all__ = ["PickHistory", "MENU_HISTORY_DEPTH", "MENU_HISTORY_CHANNELS", "MENU_HISTORY_DB"]
@@ -0,0 +1,40 @@
+# sampling.py
+import random
+
+
+class AliasTable:
+    """가중치 목록에서 O(1)로 뽑는 별칭 표 (Vose alias method). 표는 생성 시 한 번만 만든다."""
+
+    def __init__(self, items, weights):
+        if len(items) != len(weights) or not items:
+            raise ValueError("항목과 가중치 개수가 같아야 하고 비어 있으면 안 됩니다.")
+        total = float(sum(weights))
+        if total <= 0 or min(weights) < 0:
+            raise ValueError("가중치는 0 이상이고 합이 0보다 커야 합니다.")
+
+        n = len(items)
+        self.items = list(items)
+        self._prob = [0.0] * n
+        self._alias = [0] * n
+
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self._prob[s], self._alias[s] = scaled[s], l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        # 부동소수점 오차로 남은 칸은 확률 1
+        for i in small + large:
+            self._prob[i] = 1.0
+
+    def sample(self, rng=random):
+        u = rng.random() * len(self._prob)
+        i = int(u)
+        return self.items[i] if u - i < self._prob[i] else self.items[self._alias[i]]
+
+    def __len__(self):
+        return len(self.items)
+
+__all__ = ["AliasTable"]
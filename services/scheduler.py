@@ -0,0 +1,30 @@
+# scheduler.py
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from services.lazy import per_process
+from services import metrics
+
+# 등록된 주기 작업. 스케줄러가 실제로 시작될 때 한꺼번에 추가한다
+_jobs = {}
+
+
+def register_job(func, trigger, id, **trigger_args):
+    """예약 공지 전송, 날씨 예보 선조회 등 백그라운드 작업을 등록 (import 시 스레드를 띄우지 않는다)."""
+    _jobs[id] = (func, trigger, trigger_args)
+    scheduler = get_scheduler.peek()
+    if scheduler is not None:
+        scheduler.add_job(func, trigger=trigger, id=id, replace_existing=True, **trigger_args)
+
+
+def _create_scheduler():
+    scheduler = BackgroundScheduler()
+    metrics.instrument_scheduler(scheduler)
+    for job_id, (func, trigger, trigger_args) in _jobs.items():
+        scheduler.add_job(func, trigger=trigger, id=job_id, replace_existing=True, **trigger_args)
+    scheduler.start()
+    return scheduler
+
+# 워커 프로세스에서 처음 호출될 때 시작 (fork 전 마스터에서는 스레드를 만들지 않음)
+get_scheduler = per_process(_create_scheduler)
+
+__all__ = ["register_job", "get_scheduler"]
@@ -0,0 +1,29 @@
+# signature.py
+import os
+
+from flask import request
+from slack_sdk.signature import SignatureVerifier
+
+
+def signing_secret():
+    # import 시점이 아닌 호출 시점에 확인 (create_app에서 .env를 읽은 뒤)
+    return os.environ.get("SLACK_SIGNING_SECRET")
+
+
+def init_app(app):
+    """요청 본문을 폼 해석 전에 읽어 둔다. 폼을 먼저 읽으면 get_data()가 비어 서명을 확인할 수 없다."""
+
+    @app.before_request
+    def _cache_body():
+        if request.method == "POST":
+            request.get_data(cache=True)
+
+
+def verify_slack_request():
+    """현재 요청의 Slack v0 서명이 맞으면 True. 서명 비밀키가 없으면 False."""
+    secret = signing_secret()
+    if not secret:
+        return False
+    return SignatureVerifier(secret).is_valid_request(request.get_data(), request.headers)
+
+__all__ = ["signing_secret", "verify_slack_request", "init_app"]
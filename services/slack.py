@@ -0,0 +1,42 @@
+# slack.py
+import os
+from slack_sdk import WebClient
+
+from services.http import get_http_session, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+
+
+class PooledWebClient(WebClient):
+    """요청마다 urlopen으로 새 TCP+TLS 연결을 여는 대신 프로세스 공용 requests 세션(keep-alive 연결 풀)으로 보낸다.
+
+    오류·재시도 처리는 WebClient 그대로다. 프록시를 쓰면 원래 방식으로 보낸다.
+    """
+
+    def _perform_urllib_http_request_internal(self, url, req):
+        if self.proxy is not None or not url.lower().startswith("http"):
+            return super()._perform_urllib_http_request_internal(url, req)
+        resp = get_http_session().post(
+            url,
+            data=req.data,
+            headers={k: str(v) for k, v in req.header_items()},
+            timeout=(HTTP_CONNECT_TIMEOUT, self.timeout),
+        )
+        headers = dict(resp.headers)
+        # urllib 경로와 같이 Retry-After는 두 가지 표기로 모두 넣어 둔다
+        if "Retry-After" in resp.headers:
+            headers["Retry-After"] = headers["retry-after"] = resp.headers["Retry-After"]
+        if resp.headers.get("Content-Type", "").startswith("application/gzip"):
+            return {"status": resp.status_code, "headers": headers, "body": resp.content}
+        resp.encoding = resp.encoding or "utf-8"
+        return {"status": resp.status_code, "headers": headers, "body": resp.text}
+
+
+def create_client(token=None):
+    """슬랙 클라이언트. token이 없으면 SLACK_BOT_TOKEN 환경 변수를 쓴다."""
+    # 벤치마크 등에서 로컬 스텁 서버를 쓰도록 API 주소를 바꿀 수 있다
+    return PooledWebClient(
+        token=token or os.environ.get("SLACK_BOT_TOKEN"),
+        base_url=os.environ.get("SLACK_API_URL", WebClient.BASE_URL),
+        timeout=int(HTTP_READ_TIMEOUT),
+    )
+
+__all__ = ["create_client", "PooledWebClient"]
@@ -0,0 +1,258 @@
+# workspaces.py
+"""여러 워크스페이스(team_id)를 한 배포에서 처리하기 위한 설치 정보 저장소와 워크스페이스 풀.
+
+    python -m services.workspaces add T0123 xoxb-... [팀 이름]
+    python -m services.workspaces remove T0123
+    python -m services.workspaces list
+"""
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from services import aio
+from services.channel_directory import ChannelDirectory
+from services.delivery import DeliveryQueue, DeliveryQueueClosed
+from services.delivery_log import get_delivery_log
+from services.http import HTTP_READ_TIMEOUT
+from services.lazy import per_process
+from services.metrics import registry, Gauge
+from services.slack import create_client
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SLACK_INSTALL_DB = os.environ.get("SLACK_INSTALL_DB", os.path.join(BASE_DIR, "..", "installations.sqlite3"))
+# 메모리에 유지할 워크스페이스(클라이언트 + 채널 캐시 + 전송 대기열) 수
+SLACK_WORKSPACE_POOL_SIZE = int(os.environ.get("SLACK_WORKSPACE_POOL_SIZE", "32"))
+# SLACK_BOT_TOKEN을 쓰는 기본 워크스페이스. team_id가 없는 요청, SLACK_DEFAULT_TEAM_ID 팀,
+# 설치 정보가 하나도 없을 때(단일 워크스페이스 배포)만 쓰고, 그 밖의 설치되지 않은 팀은 거절한다
+DEFAULT_WORKSPACE = ""
+# 풀에 올라온 워크스페이스의 설치 정보를 다시 확인하는 주기(초). 추가·토큰 교체·삭제를 반영
+WORKSPACE_RECHECK_INTERVAL = float(os.environ.get("WORKSPACE_RECHECK_INTERVAL", "60"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS installations (
+    team_id TEXT PRIMARY KEY,
+    bot_token TEXT NOT NULL,
+    team_name TEXT,
+    installed_at REAL NOT NULL
+);
+"""
+
+
+class InstallStore:
+    """워크스페이스별 봇 토큰을 로컬 SQLite에 저장한다."""
+
+    def __init__(self, path=SLACK_INSTALL_DB):
+        self.path = path
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def save(self, team_id, bot_token, team_name=None):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO installations (team_id, bot_token, team_name, installed_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (team_id) DO UPDATE SET bot_token = excluded.bot_token,"
+                " team_name = excluded.team_name, installed_at = excluded.installed_at",
+                (team_id, bot_token, team_name, time.time()),
+            )
+
+    def bot_token(self, team_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT bot_token FROM installations WHERE team_id = ?", (team_id,)).fetchone()
+        return row["bot_token"] if row else None
+
+    def remove(self, team_id):
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM installations WHERE team_id = ?", (team_id,)).rowcount > 0
+
+    def is_empty(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM installations LIMIT 1").fetchone() is None
+
+    def all(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT team_id, team_name, installed_at FROM installations ORDER BY team_id").fetchall()
+
+
+class Workspace:
+    """한 워크스페이스의 슬랙 클라이언트, 채널 캐시, 전송 대기열. 요청 한도 버킷도 워크스페이스별로 따로 둔다."""
+
+    def __init__(self, key, token):
+        self.key = key
+        self.token = token
+        self.client = create_client(token)
+        self.channels = ChannelDirectory(self.client)
+        self.delivery = DeliveryQueue(self.client, log=get_delivery_log(), team_id=key)
+        self._async_client = None
+
+    def async_client(self, session):
+        """비동기 실행 모드용 AsyncWebClient. 이벤트 루프 스레드에서 호출한다."""
+        if self._async_client is None:
+            self._async_client = aio.AsyncWebClient(
+                token=self.token,
+                base_url=os.environ.get("SLACK_API_URL", aio.AsyncWebClient.BASE_URL),
+                timeout=int(HTTP_READ_TIMEOUT),
+                session=session,
+            )
+        return self._async_client
+
+    def post_message(self, channel, text, **kwargs):
+        """전송 대기열에 메시지를 넣는다 (requested_by를 주면 그 사용자가 전송 상태를 조회할 수 있다). 토큰 교체·풀 정리로 이미 닫힌 워크스페이스면 풀에서 다시 받아 넣는다."""
+        try:
+            return self.delivery.post_message(channel, text, **kwargs)
+        except DeliveryQueueClosed:
+            return get_workspace(self.key).delivery.post_message(channel, text, **kwargs)
+
+    def close(self):
+        """전송 대기열을 닫는다. 남은 전송은 마저 보낸 뒤 작업자가 끝난다. 대기 중인 전송이 없었으면 True."""
+        return self.delivery.close()
+
+
+class WorkspacePool:
+    """team_id → Workspace LRU 풀. 넘치면 가장 오래 쓰지 않았고 전송 대기가 없는 워크스페이스부터 내린다."""
+
+    def __init__(self, store, capacity=SLACK_WORKSPACE_POOL_SIZE):
+        self.store = store
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._workspaces = OrderedDict()   # 워크스페이스 키(team_id 또는 기본) → Workspace
+        self._keys = OrderedDict()         # 요청의 team_id → (워크스페이스 키, 설치 정보 확인 시각)
+
+    def _resolve(self, team_id):
+        """(워크스페이스 키, 토큰). 기본 워크스페이스로 처리할 수 없는 미설치 팀이면 RuntimeError."""
+        token = self.store.bot_token(team_id) if team_id else None
+        if token:
+            return team_id, token
+        token = os.environ.get("SLACK_BOT_TOKEN")
+        default_team = os.environ.get("SLACK_DEFAULT_TEAM_ID")
+        if token and (not team_id or team_id == default_team or self.store.is_empty()):
+            return DEFAULT_WORKSPACE, token
+        raise RuntimeError(f"설치되지 않은 워크스페이스입니다: {team_id}")
+
+    def get(self, team_id=None):
+        team_id = team_id or ""
+        with self._lock:
+            workspace = self._lookup(team_id, time.monotonic() - WORKSPACE_RECHECK_INTERVAL)
+            if workspace is not None:
+                return workspace
+
+        # 풀에 없거나 확인한 지 오래되었을 때만 설치 정보를 조회 (잠금 밖에서)
+        try:
+            key, token = self._resolve(team_id)
+        except RuntimeError:
+            self.invalidate(team_id)
+            raise
+        with self._lock:
+            self._keys[team_id] = (key, time.monotonic())
+            self._keys.move_to_end(team_id)
+            while len(self._keys) > self.capacity * 4:
+                self._keys.popitem(last=False)
+            workspace = self._workspaces.get(key)
+            if workspace is not None and workspace.token != token:
+                # 토큰이 바뀌었으면 새 클라이언트로 교체. 옛 대기열은 남은 것을 마저 보내고 작업자가 끝난다
+                workspace.close()
+                workspace = None
+            if workspace is None:
+                workspace = self._workspaces[key] = Workspace(key, token)
+                self._evict()
+            self._workspaces.move_to_end(key)
+            return workspace
+
+    def peek(self, team_id=None):
+        """이미 풀에 있는 워크스페이스만 반환 (없으면 None, 새로 만들지 않는다)."""
+        with self._lock:
+            return self._lookup(team_id or "")
+
+    def _lookup(self, team_id, checked_after=None):
+        """잠금을 잡은 상태에서 호출. checked_after보다 전에 확인한 항목은 없는 것으로 본다."""
+        key, checked_at = self._keys.get(team_id, (None, 0.0))
+        if key is None or (checked_after is not None and checked_at < checked_after):
+            return None
+        workspace = self._workspaces.get(key)
+        if workspace is not None:
+            self._keys.move_to_end(team_id)
+            self._workspaces.move_to_end(key)
+        return workspace
+
+    def _evict(self):
+        """잠금을 잡은 상태에서 호출. 전송 중인 워크스페이스는 건너뛰므로 잠시 한도를 넘을 수 있다."""
+        for key in list(self._workspaces):
+            if len(self._workspaces) <= self.capacity:
+                return
+            workspace = self._workspaces[key]
+            if workspace.delivery.idle:
+                workspace.close()
+                del self._workspaces[key]
+
+    def invalidate(self, team_id):
+        """토큰이 바뀌었거나 삭제된 워크스페이스를 다음 요청에서 다시 읽도록 한다."""
+        with self._lock:
+            key, _ = self._keys.pop(team_id, (None, 0.0))
+            workspace = self._workspaces.pop(key, None) if key else None
+            if workspace is not None:
+                # 남은 전송을 마저 보내고 작업자가 끝난다 (삭제된 토큰이면 바로 실패로 끝난다)
+                workspace.close()
+
+    def workspaces(self):
+        with self._lock:
+            return list(self._workspaces.values())
+
+
+get_workspace_pool = per_process(lambda: WorkspacePool(InstallStore()))
+
+
+def get_workspace(team_id=None):
+    """요청의 team_id에 해당하는 워크스페이스."""
+    return get_workspace_pool().get(team_id)
+
+
+def is_default_workspace(team_id=None):
+    """요청의 team_id가 SLACK_BOT_TOKEN을 쓰는 기본 워크스페이스로 처리되는지."""
+    return get_workspace(team_id).key == DEFAULT_WORKSPACE
+
+
+def _pool_size():
+    pool = get_workspace_pool.peek()
+    return len(pool.workspaces()) if pool else 0
+
+def _pending_count():
+    pool = get_workspace_pool.peek()
+    return sum(w.delivery.stats()["pending"] for w in pool.workspaces()) if pool else 0
+
+registry.register(Gauge("slack_workspaces_active", "메모리에 올라와 있는 워크스페이스 수", _pool_size))
+registry.register(Gauge("delivery_queue_pending", "전송 대기 중인 Slack 메시지 수", _pending_count))
+
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    store = InstallStore()
+    if len(args) >= 3 and args[0] == "add":
+        store.save(args[1], args[2], " ".join(args[3:]) or None)
+        print(f"{args[1]} 설치 정보를 저장했습니다.")
+    elif len(args) == 2 and args[0] == "remove":
+        print(f"{args[1]} 설치 정보를 삭제했습니다." if store.remove(args[1]) else f"{args[1]} 설치 정보가 없습니다.")
+    elif args == ["list"]:
+        for row in store.all():
+            print(row["team_id"], row["team_name"] or "", time.strftime("%Y-%m-%d %H:%M", time.localtime(row["installed_at"])))
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+__all__ = ["InstallStore", "Workspace", "WorkspacePool", "get_workspace", "get_workspace_pool", "is_default_workspace"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())